@@ -0,0 +1,56 @@
+import asyncio
+
+
+class AgentTurnAudio:
+    """Deepgram's own synthesized speech for one agent turn."""
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.changed = asyncio.Event()
+
+    def feed(self, audio):
+        self.chunks.append(audio)
+        self.changed.set()
+
+    def finish(self):
+        self.done = True
+        self.changed.set()
+
+    async def wait_audio(self):
+        """True once audio has arrived, False if the turn ended without any."""
+        while not self.chunks and not self.done:
+            self.changed.clear()
+            await self.changed.wait()
+        return bool(self.chunks)
+
+    async def stream(self):
+        """Yield what is buffered, then live chunks until the turn is done."""
+        sent = 0
+        while True:
+            while sent < len(self.chunks):
+                yield self.chunks[sent]
+                sent += 1
+            if self.done:
+                return
+            self.changed.clear()
+            await self.changed.wait()
+
+
+class AgentAudioBuffer:
+    """Per-call buffer of the agent's audio, rotated at every turn boundary.
+
+    `current` collects the binary frames Deepgram sends for the turn being
+    spoken; AgentAudioDone (or a barge-in) closes it and opens the next one, so
+    a turn's text and audio meet in the same object whichever arrives first.
+    """
+
+    def __init__(self):
+        self.current = AgentTurnAudio()
+
+    def feed(self, audio):
+        self.current.feed(audio)
+
+    def end_turn(self):
+        self.current.finish()
+        self.current = AgentTurnAudio()
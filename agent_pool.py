@@ -0,0 +1,198 @@
+import asyncio
+import json
+import logging
+import math
+import time
+from collections import deque
+
+import websockets
+
+from agent_settings import AGENT_SETTINGS
+from logs import NOISY
+from config import (
+    DEEPGRAM_WS_URL,
+    DEEPGRAM_API_KEY,
+    AGENT_POOL_MIN,
+    AGENT_POOL_MAX,
+    AGENT_POOL_TTL,
+    AGENT_KEEPALIVE_INTERVAL,
+)
+
+log = logging.getLogger("agent_pool")
+
+KEEPALIVE_MESSAGE = json.dumps({"type": "KeepAlive"})
+# Arrival-rate estimate: calls seen in the last WINDOW seconds, scaled to the
+# number expected within HORIZON seconds (roughly one connect + Settings).
+ARRIVAL_WINDOW = 60.0
+ARRIVAL_HORIZON = 10.0
+MAINTAIN_INTERVAL = 1.0
+
+
+async def open_agent_connection():
+    ws = await websockets.connect(
+        DEEPGRAM_WS_URL,
+        extra_headers={"Authorization": f"Token {DEEPGRAM_API_KEY}"},
+    )
+    await ws.send(AGENT_SETTINGS.payload)
+    return ws
+
+
+class AgentConnection:
+    """A configured Deepgram agent socket.
+
+    While parked in the pool, a reader task buffers everything the agent sends
+    (Welcome, SettingsApplied, the greeting) and keeps the session alive. Once
+    claimed, iterating the connection replays that buffer and then continues
+    with the live socket, so it can stand in for the raw websocket.
+    """
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.settings_version = AGENT_SETTINGS.version
+        self.created = time.monotonic()
+        self.buffered = []
+        self.parked_task = None
+
+    def park(self):
+        self.parked_task = asyncio.create_task(self._parked())
+
+    async def _parked(self):
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(self.ws.recv(), AGENT_KEEPALIVE_INTERVAL)
+                    self.buffered.append(message)
+                except asyncio.TimeoutError:
+                    await self.ws.send(KEEPALIVE_MESSAGE)
+        except websockets.ConnectionClosed:
+            # Leaves the task done, so the pool discards this connection.
+            pass
+
+    async def claim(self):
+        # Wait for the parked reader to finish cancelling so its pending recv()
+        # is released before the call starts reading the socket.
+        if self.parked_task:
+            self.parked_task.cancel()
+            await asyncio.gather(self.parked_task, return_exceptions=True)
+            self.parked_task = None
+        return self
+
+    @property
+    def usable(self):
+        return (
+            self.ws.open
+            and (self.parked_task is None or not self.parked_task.done())
+            and time.monotonic() - self.created < AGENT_POOL_TTL
+            and self.settings_version == AGENT_SETTINGS.version
+        )
+
+    async def send(self, message):
+        await self.ws.send(message)
+
+    async def close(self):
+        if self.parked_task:
+            self.parked_task.cancel()
+            self.parked_task = None
+        await self.ws.close()
+
+    async def __aiter__(self):
+        while self.buffered:
+            yield self.buffered.pop(0)
+        async for message in self.ws:
+            yield message
+
+
+class AgentPool:
+    """Keeps a few agent sessions connected and configured ahead of calls.
+
+    The target size follows the recent call arrival rate between AGENT_POOL_MIN
+    and AGENT_POOL_MAX; parked sessions are replaced after AGENT_POOL_TTL.
+    """
+
+    def __init__(self, min_size=AGENT_POOL_MIN, max_size=AGENT_POOL_MAX, connect=open_agent_connection):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.connect = connect
+        self.idle = deque()
+        self.connecting = 0
+        self.arrivals = deque()
+        self.hits = 0
+        self.misses = 0
+        self.task = None
+
+    @property
+    def target_size(self):
+        now = time.monotonic()
+        while self.arrivals and now - self.arrivals[0] > ARRIVAL_WINDOW:
+            self.arrivals.popleft()
+        expected = math.ceil(len(self.arrivals) * ARRIVAL_HORIZON / ARRIVAL_WINDOW)
+        return max(self.min_size, min(self.max_size, expected))
+
+    async def acquire(self):
+        """Claim a warm session, or open one on the spot if none is ready."""
+        self.arrivals.append(time.monotonic())
+        while self.idle:
+            conn = self.idle.popleft()
+            if conn.usable:
+                self.hits += 1
+                self._kick()
+                return await conn.claim()
+            asyncio.create_task(conn.close())
+        self.misses += 1
+        self._kick()
+        return AgentConnection(await self.connect())
+
+    async def _add_one(self):
+        try:
+            conn = AgentConnection(await self.connect())
+            conn.park()
+            self.idle.append(conn)
+        except Exception as e:
+            log.warning("Failed to pre-connect: %s", e, extra=NOISY)
+            await asyncio.sleep(MAINTAIN_INTERVAL)
+        finally:
+            self.connecting -= 1
+
+    def _maintain(self):
+        for conn in list(self.idle):
+            if not conn.usable:
+                self.idle.remove(conn)
+                asyncio.create_task(conn.close())
+        target = self.target_size
+        while len(self.idle) > target:
+            asyncio.create_task(self.idle.popleft().close())
+        missing = target - len(self.idle) - self.connecting
+        for _ in range(max(0, missing)):
+            self.connecting += 1
+            asyncio.create_task(self._add_one())
+
+    def _kick(self):
+        if self.task is not None:
+            self._maintain()
+
+    async def _run(self):
+        while True:
+            self._maintain()
+            await asyncio.sleep(MAINTAIN_INTERVAL)
+
+    def start(self):
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            self.task = None
+        while self.idle:
+            await self.idle.popleft().close()
+
+    def stats(self):
+        return {
+            "idle": len(self.idle),
+            "connecting": self.connecting,
+            "target": self.target_size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+AGENT_POOL = AgentPool()
@@ -0,0 +1,72 @@
+import asyncio
+import json
+import logging
+
+from config import PROMPTS_DIR, PROMPT_RELOAD_INTERVAL, build_config
+
+log = logging.getLogger("agent_settings")
+
+
+def _snapshot(prompts_dir):
+    return {
+        path: (stat.st_mtime_ns, stat.st_size)
+        for path in prompts_dir.rglob("*")
+        if path.is_file()
+        for stat in (path.stat(),)
+    }
+
+
+class AgentSettings:
+    """The Settings message, serialized once and recompiled when prompts change.
+
+    `payload` is the ready-to-send JSON text; calls never re-serialize the dict.
+    The watcher polls mtimes under prompts/ and recompiles once a change has
+    been stable for one interval (so half-written files are not picked up),
+    then swaps `payload` in a single assignment.
+    """
+
+    def __init__(self, prompts_dir=PROMPTS_DIR):
+        self.prompts_dir = prompts_dir
+        self.version = 0
+        self.snapshot = None
+        self.config = None
+        self.payload = None
+        self.task = None
+        self.compile()
+
+    def compile(self):
+        snapshot = _snapshot(self.prompts_dir)
+        config = build_config()
+        self.config = config
+        self.payload = json.dumps(config)
+        self.snapshot = snapshot
+        self.version += 1
+
+    async def _watch(self, interval):
+        pending = None
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                snapshot = _snapshot(self.prompts_dir)
+                if snapshot == self.snapshot:
+                    pending = None
+                elif snapshot != pending:
+                    pending = snapshot
+                else:
+                    self.compile()
+                    pending = None
+                    log.info("Prompts changed, recompiled (version %s)", self.version)
+            except Exception as e:
+                log.error("Reload failed, keeping version %s: %s", self.version, e)
+
+    def start(self, interval=PROMPT_RELOAD_INTERVAL):
+        if interval > 0:
+            self.task = asyncio.create_task(self._watch(interval))
+
+    def stop(self):
+        if self.task:
+            self.task.cancel()
+            self.task = None
+
+
+AGENT_SETTINGS = AgentSettings()
@@ -1,11 +1,113 @@
+import argparse
 import asyncio
+import logging
+import signal
+import time
 import websockets
+import handlers
+import elevenlabs_utils
 from handlers import twilio_handler
+from audio_assets import AUDIO_ASSETS
+from webhooks import WEBHOOKS
+from outbox import OUTBOX
+from recordings import RECORDINGS
+from agent_pool import AGENT_POOL
+from agent_settings import AGENT_SETTINGS
+from twilio_utils import close_twilio_client
+from metrics import METRICS_SERVER, REGISTRY
+from logs import LOGGING
+from silence_gate import SILENCE_STATS
+from audio_queue import QUEUE_STATS
+from timer_wheel import TIMERS
+from config import SERVER_HOST, SERVER_PORT, WORKERS, WORKER_DRAIN_TIMEOUT, METRICS_PORT
+
+log = logging.getLogger("app")
+
+async def _heartbeat(report, draining=False):
+    while True:
+        report(handlers.active_calls, draining)
+        await asyncio.sleep(1.0)
+
+def _register_gauges():
+    sessions = handlers.live_sessions
+    cache = elevenlabs_utils.phrase_cache
+    REGISTRY.gauge("voice_active_calls", "Calls currently served by this process.",
+                   lambda: handlers.active_calls)
+    REGISTRY.gauge("voice_audio_queue_depth_ms", "Inbound audio buffered for Deepgram, all calls.",
+                   lambda: sum(s.audio_queue.depth_ms for s in sessions))
+    REGISTRY.gauge("voice_audio_queue_max_lag_ms", "Oldest inbound audio waiting for Deepgram.",
+                   lambda: max((s.audio_queue.lag_ms for s in sessions), default=0))
+    REGISTRY.counter("voice_audio_dropped_bytes_total", "Inbound audio dropped by full queues.",
+                     lambda: QUEUE_STATS["dropped_bytes"])
+    REGISTRY.gauge("voice_playout_queued_ms", "Outbound audio not yet sent to Twilio, all calls.",
+                   lambda: sum(s.playout.queued_ms for s in sessions))
+    REGISTRY.counter("voice_tts_cache_hits_total", "TTS phrase cache hits.", lambda: cache.stats()["hits"])
+    REGISTRY.counter("voice_tts_cache_misses_total", "TTS phrase cache misses.", lambda: cache.stats()["misses"])
+    REGISTRY.gauge("voice_tts_cache_bytes", "TTS phrase cache memory use.", lambda: cache.stats()["bytes"])
+    REGISTRY.counter("voice_tts_hedge_elevenlabs_turns_total", "Hedged turns voiced by ElevenLabs.",
+                     lambda: elevenlabs_utils.HEDGE_STATS["elevenlabs"])
+    REGISTRY.counter("voice_tts_hedge_agent_audio_turns_total", "Hedged turns voiced by Deepgram's agent audio.",
+                     lambda: elevenlabs_utils.HEDGE_STATS["agent_audio"])
+    REGISTRY.counter("voice_stt_silence_withheld_bytes_total", "Caller silence not forwarded to STT.",
+                     lambda: SILENCE_STATS["withheld_bytes"])
+    REGISTRY.counter("voice_stt_silence_withheld_frames_total", "Caller silence frames not forwarded to STT.",
+                     lambda: SILENCE_STATS["withheld_frames"])
+    REGISTRY.gauge("voice_agent_pool_idle", "Pre-warmed agent connections ready to claim.",
+                   lambda: AGENT_POOL.stats()["idle"])
+    REGISTRY.gauge("voice_agent_pool_target", "Current agent pool target size.",
+                   lambda: AGENT_POOL.stats()["target"])
+
+async def serve(reuse_port=False, report=None, metrics_port=METRICS_PORT):
+    """Serve calls until SIGTERM, then stop accepting and drain active calls."""
+    LOGGING.start()
+    log.info("Starting")
+    AUDIO_ASSETS.load()
+    OUTBOX.start()
+    RECORDINGS.start()
+    AGENT_SETTINGS.start()
+    AGENT_POOL.start()
+    _register_gauges()
+    await METRICS_SERVER.start(metrics_port)
+
+    stop = asyncio.Event()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+    heartbeat = asyncio.create_task(_heartbeat(report)) if report else None
+    server = await websockets.serve(twilio_handler, SERVER_HOST, SERVER_PORT, reuse_port=reuse_port)
+    try:
+        await stop.wait()
+        if heartbeat:
+            heartbeat.cancel()
+            heartbeat = asyncio.create_task(_heartbeat(report, draining=True))
+        server.close(close_connections=False)
+        log.info("Draining %d active calls", handlers.active_calls)
+        deadline = time.monotonic() + WORKER_DRAIN_TIMEOUT
+        while handlers.active_calls and time.monotonic() < deadline:
+            await asyncio.sleep(0.5)
+        server.close()
+        await server.wait_closed()
+    finally:
+        if heartbeat:
+            heartbeat.cancel()
+        OUTBOX.stop()
+        RECORDINGS.stop()
+        TIMERS.stop()
+        await AGENT_POOL.stop()
+        await METRICS_SERVER.stop()
+        AGENT_SETTINGS.stop()
+        await WEBHOOKS.aclose()
+        await close_twilio_client()
+        LOGGING.stop()
 
 async def main():
-    print("[Server] Starting...")
-    async with websockets.serve(twilio_handler, "0.0.0.0", 5000):
-        await asyncio.Future()
+    await serve()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Twilio <-> Deepgram voice agent server")
+    parser.add_argument("--workers", type=int, default=WORKERS,
+                        help="Fork N worker processes sharing the port via SO_REUSEPORT")
+    args = parser.parse_args()
+    if args.workers > 1:
+        from supervisor import Supervisor
+        Supervisor(args.workers).run()
+    else:
+        asyncio.run(main())
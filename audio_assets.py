@@ -0,0 +1,51 @@
+import logging
+from pathlib import Path
+from twilio_codec import media_suffix
+
+log = logging.getLogger("audio_assets")
+
+ASSETS_DIR = Path(__file__).resolve().parent / "deepgram_tts"
+
+# 20 ms of 8 kHz mu-law, the frame size Twilio itself streams in.
+FRAME_BYTES = 160
+
+
+class AudioAsset:
+    """A stock prompt held in memory, pre-split into serialized media frames."""
+
+    def __init__(self, name, audio, frame_bytes=FRAME_BYTES):
+        self.name = name
+        self.audio = audio
+        self.duration = len(audio) / 8000.0
+        # Everything after the streamSid is constant, so each frame is stored as
+        # the tail of its media message and only the sid is spliced in at send.
+        self.frame_suffixes = [
+            media_suffix(audio[i:i + frame_bytes])
+            for i in range(0, len(audio), frame_bytes)
+        ]
+
+
+class AudioAssetRegistry:
+    def __init__(self, assets_dir=ASSETS_DIR):
+        self.assets_dir = Path(assets_dir)
+        self.assets = {}
+        self.loaded = False
+
+    def load(self):
+        assets = {}
+        for path in sorted(self.assets_dir.glob("*.ulaw")):
+            try:
+                assets[path.stem] = AudioAsset(path.stem, path.read_bytes())
+            except Exception as e:
+                log.error("Failed to load %s: %s", path, e)
+        self.assets = assets
+        self.loaded = True
+        log.info("Loaded %d prompts: %s", len(assets), ", ".join(assets))
+
+    def get(self, name):
+        if not self.loaded:
+            self.load()
+        return self.assets.get(name)
+
+
+AUDIO_ASSETS = AudioAssetRegistry()
@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+from config import AUDIO_QUEUE_MAX_MS, AUDIO_QUEUE_POLICY, AUDIO_QUEUE_LAG_WARN_MS
+from logs import NOISY
+
+log = logging.getLogger("audio_queue")
+
+POLICIES = ("drop_oldest", "coalesce", "close")
+LAG_WARN_INTERVAL = 5.0
+
+# Process-wide totals across every call's queue, for /metrics.
+QUEUE_STATS = {"dropped_bytes": 0}
+
+
+class QueueClosed(Exception):
+    pass
+
+
+class InboundAudioQueue:
+    """Bounded per-call buffer between twilio_receiver and sts_sender.
+
+    Holds at most `max_ms` of caller audio. When Deepgram falls behind and the
+    buffer is full, `policy` decides what happens:
+
+    - drop_oldest: discard the oldest audio so STT stays close to real time;
+    - coalesce: merge everything queued into one chunk (fewer, larger sends let
+      the socket catch up), then drop the oldest bytes past the budget;
+    - close: call `on_overflow` so the call is torn down.
+    """
+
+    def __init__(self, max_ms=AUDIO_QUEUE_MAX_MS, policy=AUDIO_QUEUE_POLICY, on_overflow=None):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown audio queue policy: {policy}")
+        self.max_bytes = int(max_ms * 8)
+        self.policy = policy
+        self.on_overflow = on_overflow
+        self.items = deque()
+        self.size = 0
+        self.readable = asyncio.Event()
+        self.closed = False
+        self.dropped_bytes = 0
+        self.coalesced = 0
+        self.overflows = 0
+        self.last_lag_warning = 0.0
+
+    def put_nowait(self, chunk):
+        if self.closed:
+            return
+        self.items.append((time.monotonic(), chunk))
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            self._overflow()
+        self.readable.set()
+
+    async def get(self):
+        while not self.items:
+            if self.closed:
+                raise QueueClosed()
+            self.readable.clear()
+            await self.readable.wait()
+        enqueued, chunk = self.items.popleft()
+        self.size -= len(chunk)
+        self._check_lag(enqueued)
+        return chunk
+
+    async def get_coalesced(self, min_bytes, max_bytes, max_wait):
+        """Return queued audio merged into one write of up to `max_bytes`.
+
+        Waits until at least `min_bytes` are queued or the oldest frame is
+        `max_wait` seconds old, whichever comes first. A single pending frame is
+        returned as-is; otherwise the frames are joined with one copy.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            if self.closed and not self.items:
+                raise QueueClosed()
+            if self.items:
+                deadline = self.items[0][0] + max_wait
+                if self.size >= min_bytes or self.closed or loop.time() >= deadline:
+                    break
+                timer = loop.call_at(deadline, self.readable.set)
+            else:
+                timer = None
+            self.readable.clear()
+            await self.readable.wait()
+            if timer:
+                timer.cancel()
+
+        enqueued, first = self.items.popleft()
+        self.size -= len(first)
+        if not self.items or len(first) >= max_bytes:
+            self._check_lag(enqueued)
+            return first
+
+        parts = [first]
+        taken = len(first)
+        while self.items and taken + len(self.items[0][1]) <= max_bytes:
+            _, chunk = self.items.popleft()
+            parts.append(chunk)
+            taken += len(chunk)
+        self.size -= taken - len(first)
+        self._check_lag(enqueued)
+        return b"".join(parts)
+
+    def close(self):
+        self.closed = True
+        self.items.clear()
+        self.size = 0
+        self.readable.set()
+
+    def _overflow(self):
+        self.overflows += 1
+        if self.policy == "close":
+            log.warning("Overflow (%.0f ms queued), closing call", self.depth_ms)
+            self.close()
+            if self.on_overflow:
+                self.on_overflow()
+            return
+
+        if self.policy == "coalesce" and len(self.items) > 1:
+            enqueued = self.items[0][0]
+            merged = b"".join(chunk for _, chunk in self.items)
+            self.coalesced += len(self.items) - 1
+            self.items.clear()
+            self.items.append((enqueued, merged))
+
+        while self.size > self.max_bytes and self.items:
+            enqueued, chunk = self.items.popleft()
+            excess = self.size - self.max_bytes
+            if len(chunk) > excess and self.policy == "coalesce":
+                # Trim the merged chunk instead of dropping it whole.
+                self.items.appendleft((enqueued, chunk[excess:]))
+                self.size -= excess
+                self.dropped_bytes += excess
+                QUEUE_STATS["dropped_bytes"] += excess
+            else:
+                self.size -= len(chunk)
+                self.dropped_bytes += len(chunk)
+                QUEUE_STATS["dropped_bytes"] += len(chunk)
+
+    def _check_lag(self, enqueued):
+        now = time.monotonic()
+        lag_ms = (now - enqueued) * 1000.0
+        if lag_ms > AUDIO_QUEUE_LAG_WARN_MS and now - self.last_lag_warning > LAG_WARN_INTERVAL:
+            self.last_lag_warning = now
+            log.warning("STT falling behind: lag=%.0f ms, depth=%.0f ms, dropped=%.0f ms",
+                        lag_ms, self.depth_ms, self.dropped_bytes / 8, extra=NOISY)
+
+    @property
+    def depth_ms(self):
+        return self.size / 8.0
+
+    @property
+    def lag_ms(self):
+        """Age of the oldest queued audio, i.e. how far behind real time STT is."""
+        if not self.items:
+            return 0.0
+        return (time.monotonic() - self.items[0][0]) * 1000.0
+
+    def stats(self):
+        return {
+            "depth_ms": self.depth_ms,
+            "lag_ms": self.lag_ms,
+            "dropped_ms": self.dropped_bytes / 8.0,
+            "coalesced_frames": self.coalesced,
+            "overflows": self.overflows,
+        }
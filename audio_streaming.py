@@ -1,25 +1,14 @@
-import base64
-import json
+import logging
+from audio_assets import AUDIO_ASSETS
 
-async def stream_ulaw_audio(file_path: str, session, chunk_size: int = 64000):
-    try:
-        with open(file_path, "rb") as f:
-            audio_bytes = f.read()
-    except Exception as e:
-        print(f"[stream_ulaw_audio] Failed to read {file_path}: {e}")
+log = logging.getLogger("audio_streaming")
+
+async def stream_asset(name: str, session):
+    """Queue a preloaded prompt from deepgram_tts/ on the call's playout scheduler."""
+    asset = AUDIO_ASSETS.get(name)
+    if asset is None:
+        log.error("Unknown audio asset: %s", name)
         return
 
-    print(f"[Agent Audio] Streaming {file_path}, size={len(audio_bytes)} bytes")
-    for i in range(0, len(audio_bytes), chunk_size):
-        chunk = audio_bytes[i:i+chunk_size]
-        media_msg = {
-            "event": "media",
-            "streamSid": getattr(session.twilio_ws, "streamsid", None),
-            "media": {"payload": base64.b64encode(chunk).decode("ascii")},
-        }
-        try:
-            await session.twilio_ws.send(json.dumps(media_msg))
-        except Exception as e:
-            print(f"[stream_ulaw_audio] Error sending chunk: {e}")
-            break
-    print(f"[Agent Audio] Finished streaming {file_path}")
+    log.info("Streaming %s, size=%d bytes", name, len(asset.audio))
+    session.playout.enqueue_frames(asset.frame_suffixes)
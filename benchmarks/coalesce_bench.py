@@ -0,0 +1,101 @@
+"""Inbound forwarding cost with and without frame coalescing.
+
+Simulates N calls pushing 20 ms mu-law frames at real cadence through
+InboundAudioQueue + handlers.sts_sender into a local websocket sink running in
+a separate process, and reports websocket sends per second and CPU per call.
+
+    python benchmarks/coalesce_bench.py --calls 50 --seconds 10
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import websockets
+
+from audio_queue import InboundAudioQueue
+from handlers import sts_sender
+
+FRAME = b"\xff" * 160
+PORT = 8799
+
+
+def run_sink(ready):
+    async def sink(ws):
+        async for _ in ws:
+            pass
+
+    async def main():
+        async with websockets.serve(sink, "127.0.0.1", PORT, compression=None):
+            ready.set()
+            await asyncio.Future()
+
+    asyncio.run(main())
+
+
+class CountingSocket:
+    def __init__(self, ws):
+        self.ws = ws
+        self.sends = 0
+
+    async def send(self, data):
+        self.sends += 1
+        await self.ws.send(data)
+
+
+async def simulate_call(seconds, coalesce_ms):
+    async with websockets.connect(f"ws://127.0.0.1:{PORT}", compression=None) as ws:
+        sock = CountingSocket(ws)
+        queue = InboundAudioQueue()
+        sender = asyncio.create_task(sts_sender(sock, queue, coalesce_ms=coalesce_ms))
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for i in range(int(seconds * 50)):
+            await asyncio.sleep(max(0.0, start + i * 0.02 - loop.time()))
+            queue.put_nowait(FRAME)
+        queue.close()
+        await sender
+        return sock.sends
+
+
+async def run(calls, seconds, coalesce_ms):
+    cpu = time.process_time()
+    wall = time.perf_counter()
+    sends = await asyncio.gather(*(simulate_call(seconds, coalesce_ms) for _ in range(calls)))
+    cpu = time.process_time() - cpu
+    wall = time.perf_counter() - wall
+    return {
+        "coalesce_ms": coalesce_ms,
+        "sends_per_sec_per_call": sum(sends) / calls / seconds,
+        "cpu_ms_per_call_per_sec": cpu * 1000.0 / calls / wall,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--coalesce", type=int, nargs="+", default=[0, 40, 60, 100])
+    args = parser.parse_args()
+
+    ready = multiprocessing.Event()
+    sink = multiprocessing.Process(target=run_sink, args=(ready,), daemon=True)
+    sink.start()
+    ready.wait()
+    try:
+        for coalesce_ms in args.coalesce:
+            result = asyncio.run(run(args.calls, args.seconds, coalesce_ms))
+            print(f"coalesce={result['coalesce_ms']:>3} ms  "
+                  f"sends/s/call={result['sends_per_sec_per_call']:6.1f}  "
+                  f"cpu/call={result['cpu_ms_per_call_per_sec']:6.2f} ms/s")
+    finally:
+        sink.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Per-frame cost of the Twilio media codec versus dict + json.
+
+    python benchmarks/codec_bench.py
+"""
+import base64
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from twilio_codec import decode_payload, media_message, media_suffix, parse_media
+
+STREAM_SID = "MZ18ad3ab5a668481ce02b83e7395059f0"
+FRAME = bytes(range(160))
+INBOUND = json.dumps({
+    "event": "media",
+    "sequenceNumber": "3",
+    "media": {
+        "track": "inbound",
+        "chunk": "1",
+        "timestamp": "5",
+        "payload": base64.b64encode(FRAME).decode("ascii"),
+    },
+    "streamSid": STREAM_SID,
+}, separators=(",", ":"))
+
+
+def encode_dict_json():
+    return json.dumps({
+        "event": "media",
+        "streamSid": STREAM_SID,
+        "media": {"payload": base64.b64encode(FRAME).decode("ascii")},
+    })
+
+
+def encode_codec():
+    return media_message(STREAM_SID, media_suffix(FRAME))
+
+
+def decode_json():
+    data = json.loads(INBOUND)
+    if data.get("event") == "media":
+        media = data["media"]
+        if media.get("track") == "inbound":
+            return base64.b64decode(media["payload"])
+
+
+def decode_codec():
+    track, payload = parse_media(INBOUND)
+    if track == "inbound":
+        return decode_payload(payload)
+
+
+def per_call_ns(func, number):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e9
+
+
+def main(number=100000):
+    assert json.loads(encode_codec()) == json.loads(encode_dict_json())
+    assert decode_codec() == decode_json() == FRAME
+    results = {
+        "encode_dict_json_ns": per_call_ns(encode_dict_json, number),
+        "encode_codec_ns": per_call_ns(encode_codec, number),
+        "decode_json_ns": per_call_ns(decode_json, number),
+        "decode_codec_ns": per_call_ns(decode_codec, number),
+    }
+    for name, value in results.items():
+        print(f"{name:<22} {value:8.0f} ns/frame")
+    print(f"encode speedup: {results['encode_dict_json_ns'] / results['encode_codec_ns']:.1f}x")
+    print(f"decode speedup: {results['decode_json_ns'] / results['decode_codec_ns']:.1f}x")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""Microbenchmarks for the per-frame and per-turn hot paths.
+
+Runs each case against the real handler code with local stand-ins (an
+in-memory Twilio websocket, a throwaway SQLite outbox) and prints one JSON
+document of ns/op results. With --baseline, every case is compared against the
+stored numbers and the exit status is 1 if any got slower than --tolerance.
+
+    python benchmarks/hotpath_bench.py
+    python benchmarks/hotpath_bench.py --baseline benchmarks/hotpath_baseline.json
+    python benchmarks/hotpath_bench.py --save-baseline benchmarks/hotpath_baseline.json
+"""
+import argparse
+import asyncio
+import base64
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import handlers
+from audio_queue import InboundAudioQueue
+from function_calls import execute_function_call, create_function_call_response
+from outbox import OUTBOX
+from playout import Mark, PlayoutScheduler
+from sessions import CallSession
+from twilio_codec import media_message
+from vad import VoiceActivityDetector
+
+STREAM_SID = "MZ18ad3ab5a668481ce02b83e7395059f0"
+FRAME = bytes(range(160))
+TTS_CHUNK = bytes(range(256)) * 16  # 4096 bytes, a typical ElevenLabs chunk
+REPEAT = 5
+
+ORDER_ARGS = {
+    "prior_ordered": False,
+    "customer_name": "Jane Doe",
+    "size_yards": "20",
+    "delivery_date": "tomorrow",
+    "time_slot": "nine to one",
+    "address": "123 Main St, Las Vegas, NV 89101",
+    "parking_instructions": "driveway, left side",
+    "surface_protection": True,
+    "contact_info": "555-0100, jane@example.com",
+    "payment_method": "card on file",
+}
+
+
+class FakeTwilioSocket:
+    """Replays a fixed list of messages; sends are counted and discarded."""
+
+    def __init__(self, messages=()):
+        self.messages = messages
+        self.streamsid = STREAM_SID
+        self.sent = 0
+
+    def __aiter__(self):
+        return self._replay()
+
+    async def _replay(self):
+        for message in self.messages:
+            yield message
+
+    async def send(self, message):
+        self.sent += 1
+
+    async def close(self):
+        pass
+
+
+def media_event(sequence):
+    return json.dumps({
+        "event": "media",
+        "sequenceNumber": str(sequence),
+        "media": {
+            "track": "inbound",
+            "chunk": str(sequence),
+            "timestamp": str(sequence * 20),
+            "payload": base64.b64encode(FRAME).decode("ascii"),
+        },
+        "streamSid": STREAM_SID,
+    }, separators=(",", ":"))
+
+
+async def best_ns(run, ops):
+    """Best of REPEAT runs of `await run()`, in ns per op."""
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        await run()
+        best = min(best, time.perf_counter() - start)
+    return best / ops * 1e9
+
+
+async def bench_inbound_decode(frames):
+    """twilio_receiver: parse, decode and queue one inbound media frame."""
+    messages = [media_event(i) for i in range(frames)]
+
+    async def run():
+        queue = InboundAudioQueue(max_ms=frames * 20 + 1000)
+        session = CallSession(FakeTwilioSocket(), FakeTwilioSocket())
+        await handlers.twilio_receiver(FakeTwilioSocket(messages), queue, session)
+
+    return await best_ns(run, frames)
+
+
+async def bench_vad(frames):
+    """Local barge-in VAD on one inbound frame (alternating speech-like and quiet)."""
+    loud = bytes((i * 37) & 0x7F | (i & 1) << 7 for i in range(160))
+    quiet = b"\xfe\x7e" * 80
+    audio = [loud if (i // 50) % 2 else quiet for i in range(frames)]
+
+    async def run():
+        vad = VoiceActivityDetector()
+        for frame in audio:
+            vad.process(frame)
+
+    return await best_ns(run, frames)
+
+
+async def bench_outbound_encode(chunks):
+    """stream_agent_text: slice, serialize and wrap one frame."""
+    frames_per_run = chunks * len(TTS_CHUNK) // 160
+
+    async def run():
+        playout = PlayoutScheduler(FakeTwilioSocket())
+        playout.task = True  # keep the pacing loop out of the measurement
+        for _ in range(chunks):
+            playout.enqueue_audio(TTS_CHUNK)
+        playout.flush()
+        for item in playout.frames:
+            if not isinstance(item, Mark):
+                media_message(STREAM_SID, item)
+
+    return await best_ns(run, frames_per_run)
+
+
+async def bench_text_dispatch(messages):
+    """sts_receiver: parse and dispatch one user ConversationText message."""
+    raw = json.dumps({"type": "ConversationText", "role": "user", "content": "I need a twenty yard dumpster"})
+    session = CallSession(FakeTwilioSocket(), FakeTwilioSocket())
+
+    async def run():
+        for _ in range(messages):
+            await handlers.handle_text_message(json.loads(raw), session)
+
+    return await best_ns(run, messages)
+
+
+async def bench_function_call(name, arguments, calls):
+    """handle_function_call_request minus the send: execute and build the response."""
+
+    async def run():
+        for i in range(calls):
+            result = await execute_function_call(name, arguments)
+            json.dumps(create_function_call_response(f"call-{i}", name, result))
+
+    return await best_ns(run, calls)
+
+
+async def run_all(scale):
+    workdir = tempfile.mkdtemp(prefix="hotpath-bench-")
+    # Orders land in a throwaway outbox; the drainer (and so n8n) is never started.
+    OUTBOX.path = os.path.join(workdir, "outbox.sqlite3")
+    try:
+        return {
+            "inbound_decode_ns_per_frame": await bench_inbound_decode(2000 * scale),
+            "vad_ns_per_frame": await bench_vad(2000 * scale),
+            "outbound_encode_ns_per_frame": await bench_outbound_encode(50 * scale),
+            "text_dispatch_ns_per_message": await bench_text_dispatch(2000 * scale),
+            "function_get_info_ns_per_call": await bench_function_call("get_info", {"info_type": "pricing"}, 2000 * scale),
+            "function_place_order_ns_per_call": await bench_function_call("place_order", ORDER_ARGS, 200 * scale),
+        }
+    finally:
+        if OUTBOX.conn is not None:
+            OUTBOX.conn.close()
+            OUTBOX.conn = None
+
+
+def compare(results, baseline, tolerance):
+    """Print a comparison table to stderr; return the names of regressed cases."""
+    regressions = []
+    for name, value in results.items():
+        base = baseline.get(name)
+        if not base:
+            print(f"{name:<36} {value:10.0f}        (no baseline)", file=sys.stderr)
+            continue
+        ratio = value / base
+        flag = ""
+        if ratio > 1 + tolerance:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<36} {value:10.0f} {ratio:6.2f}x{flag}", file=sys.stderr)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=1, help="multiply the iteration counts")
+    parser.add_argument("--baseline", help="JSON file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown (0.25 = 25%%)")
+    parser.add_argument("--save-baseline", help="write these results as the new baseline")
+    args = parser.parse_args()
+
+    # Log records are still created and filtered as in production, but not written.
+    logging.getLogger().handlers = [logging.NullHandler()]
+    logging.getLogger().setLevel(logging.INFO)
+
+    results = asyncio.run(run_all(args.scale))
+    document = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": {name: round(value, 1) for name, value in results.items()},
+    }
+    print(json.dumps(document, indent=2))
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(document, f, indent=2)
+            f.write("\n")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Per-call timers: one task per watchdog vs the shared timer wheel.
+
+Simulates `--calls` concurrent calls whose silence watchdog is re-armed at
+every turn boundary (the AgentAudioDone / UserStartedSpeaking traffic) and
+reports, for each strategy, CPU per re-arm, the loop's scheduled-handle count
+with every call's timer armed, the memory those timers hold, and the CPU the
+event loop burns while the timers are merely pending.
+
+    python benchmarks/timer_bench.py
+    python benchmarks/timer_bench.py --calls 5000 --resets 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import SILENCE_TIMEOUT
+from timer_wheel import TimerWheel
+
+
+def nudge():
+    pass
+
+
+class TaskTimers:
+    """What sessions.py used to do: cancel the watchdog task and start a new one."""
+
+    def __init__(self, calls):
+        self.tasks = [None] * calls
+
+    async def _watchdog(self):
+        await asyncio.sleep(SILENCE_TIMEOUT)
+        nudge()
+
+    def reset(self, call):
+        if self.tasks[call] is not None:
+            self.tasks[call].cancel()
+        self.tasks[call] = asyncio.create_task(self._watchdog())
+
+    def stop(self):
+        for task in self.tasks:
+            task.cancel()
+
+
+class WheelTimers:
+    def __init__(self, calls):
+        self.wheel = TimerWheel()
+        self.timers = [None] * calls
+
+    def reset(self, call):
+        if self.timers[call] is None:
+            self.timers[call] = self.wheel.call_later(SILENCE_TIMEOUT, nudge)
+        else:
+            self.timers[call].reset(SILENCE_TIMEOUT)
+
+    def stop(self):
+        self.wheel.stop()
+
+
+async def run(strategy, calls, resets, idle):
+    loop = asyncio.get_running_loop()
+    timers = strategy(calls)
+
+    tracemalloc.start()
+    for call in range(calls):
+        timers.reset(call)
+    await asyncio.sleep(0)  # let the watchdog tasks reach their sleep
+    held_kib = tracemalloc.get_traced_memory()[0] / 1024
+    tracemalloc.stop()
+    scheduled = len(loop._scheduled)
+
+    start = time.process_time()
+    for _ in range(resets):
+        for call in range(calls):
+            timers.reset(call)
+        # Cancelled tasks unwind on the next loop iterations; charge that too.
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+    reset_us = (time.process_time() - start) / (calls * resets) * 1e6
+
+    start = time.process_time()
+    await asyncio.sleep(idle)
+    idle_cpu_ms = (time.process_time() - start) * 1e3
+
+    timers.stop()
+    await asyncio.sleep(0)
+    return {
+        "us_per_reset": round(reset_us, 2),
+        "scheduled_handles": scheduled,
+        "timer_memory_kib": round(held_kib, 1),
+        f"idle_cpu_ms_per_{idle:g}s": round(idle_cpu_ms, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=1000, help="concurrent calls, one watchdog each")
+    parser.add_argument("--resets", type=int, default=50, help="re-arms per call")
+    parser.add_argument("--idle", type=float, default=2.0, help="seconds to idle with every timer armed")
+    args = parser.parse_args()
+
+    document = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "calls": args.calls,
+        "task_per_timer": asyncio.run(run(TaskTimers, args.calls, args.resets, args.idle)),
+        "timer_wheel": asyncio.run(run(WheelTimers, args.calls, args.resets, args.idle)),
+    }
+    print(json.dumps(document, indent=2))
+
+
+if __name__ == "__main__":
+    main()
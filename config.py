@@ -6,201 +6,319 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Server
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "5000"))
+WORKERS = int(os.getenv("WORKERS", "1"))
+WORKER_HEALTH_TIMEOUT = float(os.getenv("WORKER_HEALTH_TIMEOUT", "10"))
+WORKER_DRAIN_TIMEOUT = float(os.getenv("WORKER_DRAIN_TIMEOUT", "600"))
+
+# Prometheus-style metrics endpoint (0 disables). In --workers mode, the worker
+# in stats slot N serves on METRICS_PORT + 1 + N.
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9100"))
+
+# Logging: JSON lines (or "text") written by a background thread.
+# LOG_LEVELS overrides per module, e.g. "playout=WARNING,handlers=DEBUG".
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = os.getenv("LOG_LEVELS", "httpx=WARNING,websockets=WARNING")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Events logged with NOISY: at most LOG_RATE_LIMIT per LOG_RATE_WINDOW seconds
+LOG_RATE_LIMIT = int(os.getenv("LOG_RATE_LIMIT", "5"))
+LOG_RATE_WINDOW = float(os.getenv("LOG_RATE_WINDOW", "10"))
+
 # Deepgram
-DEEPGRAM_WS_URL = "wss://agent.deepgram.com/v1/agent/converse"
+DEEPGRAM_WS_URL = os.getenv("DEEPGRAM_WS_URL", "wss://agent.deepgram.com/v1/agent/converse")
 DEEPGRAM_API_KEY = os.getenv("DEEPGRAM_API_KEY")
 
+# Pre-warmed, pre-configured agent connections claimed by new calls
+AGENT_POOL_MIN = int(os.getenv("AGENT_POOL_MIN", "1"))
+AGENT_POOL_MAX = int(os.getenv("AGENT_POOL_MAX", "8"))
+AGENT_POOL_TTL = float(os.getenv("AGENT_POOL_TTL", "60"))
+AGENT_KEEPALIVE_INTERVAL = float(os.getenv("AGENT_KEEPALIVE_INTERVAL", "5"))
+
 # ElevenLabs
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
 ELEVENLABS_VOICE_ID = os.getenv("ELEVENLABS_VOICE_ID")
+ELEVENLABS_TIMEOUT = float(os.getenv("ELEVENLABS_TIMEOUT", "20"))
+ELEVENLABS_BASE_URL = os.getenv("ELEVENLABS_BASE_URL") or None
+
+# TTS phrase cache (in-memory byte budget, optional on-disk tier)
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR") or None
+
+# Sentence-pipelined TTS: long assistant turns are split into segments that are
+# synthesized concurrently (at most TTS_PARALLELISM per turn) and played in order
+TTS_PARALLELISM = int(os.getenv("TTS_PARALLELISM", "3"))
+TTS_SEGMENT_MIN_CHARS = int(os.getenv("TTS_SEGMENT_MIN_CHARS", "20"))
+TTS_SEGMENT_MAX_CHARS = int(os.getenv("TTS_SEGMENT_MAX_CHARS", "200"))
+# Hedged speech: keep Deepgram's own agent audio for each turn and play it when
+# ElevenLabs has produced no audio within TTS_HEDGE_DEADLINE_MS. The agent
+# Settings message has no way to turn that audio off (leaving out audio.output
+# only falls back to Deepgram's default format), so with hedging off it still
+# arrives and sts_receiver discards it unread.
+TTS_HEDGE = os.getenv("TTS_HEDGE", "false").lower() in ("1", "true", "yes")
+TTS_HEDGE_DEADLINE_MS = int(os.getenv("TTS_HEDGE_DEADLINE_MS", "400"))
 
 # Twilio
 TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
+TWILIO_API_URL = os.getenv("TWILIO_API_URL", "https://api.twilio.com")
+
+# n8n webhooks
+N8N_WEBHOOK_BASE = os.getenv("N8N_WEBHOOK_BASE", "https://vegasdumpster.app.n8n.cloud/webhook")
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "20"))
+WEBHOOK_MAX_CONCURRENCY = int(os.getenv("WEBHOOK_MAX_CONCURRENCY", "10"))
+WEBHOOK_RETRIES = int(os.getenv("WEBHOOK_RETRIES", "2"))
+WEBHOOK_DEFAULT_TIMEOUT = 10.0
+WEBHOOK_TIMEOUTS = {
+    "place-order": 15.0,
+    "swap-service": 10.0,
+    "final-pickup-service": 10.0,
+    "extend-rental-service": 10.0,
+    "delayed-pickup-service": 10.0,
+}
+
+# Durable order outbox (SQLite, WAL mode) drained to the webhooks above
+OUTBOX_PATH = os.getenv("OUTBOX_PATH", "outbox.sqlite3")
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "20"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+
+# Inbound audio buffer between Twilio and Deepgram
+AUDIO_QUEUE_MAX_MS = int(os.getenv("AUDIO_QUEUE_MAX_MS", "2000"))
+AUDIO_QUEUE_POLICY = os.getenv("AUDIO_QUEUE_POLICY", "drop_oldest")  # drop_oldest | coalesce | close
+AUDIO_QUEUE_LAG_WARN_MS = int(os.getenv("AUDIO_QUEUE_LAG_WARN_MS", "500"))
+# Merge 20 ms Twilio frames into fewer Deepgram writes (0 sends every frame)
+STT_COALESCE_MS = int(os.getenv("STT_COALESCE_MS", "60"))
+STT_COALESCE_MAX_WAIT_MS = int(os.getenv("STT_COALESCE_MAX_WAIT_MS", "100"))
+
+# Barge-in. "words" (the default) waits for Deepgram's transcript and interrupts
+# on two or more words; "vad" opts in to interrupting once the local
+# voice-activity detector has heard BARGE_IN_MIN_SPEECH_MS of caller speech.
+BARGE_IN_MODE = os.getenv("BARGE_IN_MODE", "words")
+BARGE_IN_MIN_SPEECH_MS = int(os.getenv("BARGE_IN_MIN_SPEECH_MS", "300"))
+# VAD tuning for 8 kHz phone audio (20 ms frames)
+VAD_MARGIN_ON_DB = float(os.getenv("VAD_MARGIN_ON_DB", "12"))
+VAD_MARGIN_OFF_DB = float(os.getenv("VAD_MARGIN_OFF_DB", "6"))
+VAD_MIN_DB = float(os.getenv("VAD_MIN_DB", "-45"))
+VAD_MAX_ZCR = float(os.getenv("VAD_MAX_ZCR", "0.45"))
+VAD_START_FRAMES = int(os.getenv("VAD_START_FRAMES", "2"))
+VAD_HANGOVER_FRAMES = int(os.getenv("VAD_HANGOVER_FRAMES", "15"))
+
+# Silence-aware forwarding: after STT_SILENCE_HOLD_MS of caller silence (every
+# frame below STT_SILENCE_DB dBFS) send only one frame per STT_SILENCE_SPARSE_MS
+# to Deepgram; the last STT_SILENCE_PREROLL_MS are replayed when speech resumes
+STT_SILENCE_SUPPRESSION = os.getenv("STT_SILENCE_SUPPRESSION", "false").lower() in ("1", "true", "yes")
+STT_SILENCE_DB = float(os.getenv("STT_SILENCE_DB", "-45"))
+STT_SILENCE_HOLD_MS = int(os.getenv("STT_SILENCE_HOLD_MS", "1500"))
+STT_SILENCE_PREROLL_MS = int(os.getenv("STT_SILENCE_PREROLL_MS", "300"))
+STT_SILENCE_SPARSE_MS = int(os.getenv("STT_SILENCE_SPARSE_MS", "500"))
+
+# Outbound playout: how far ahead of real time audio is released to Twilio
+PLAYOUT_LEAD_MS = int(os.getenv("PLAYOUT_LEAD_MS", "60"))
+
+# Recording post-processing
+RECORDINGS_DIR = os.getenv("RECORDINGS_DIR", "recording")
+RECORDING_WORKERS = int(os.getenv("RECORDING_WORKERS", "2"))
+RECORDING_MAX_WAIT = float(os.getenv("RECORDING_MAX_WAIT", "300"))
 
 # Timeouts
 SILENCE_TIMEOUT = 35
 FINAL_TIMEOUT = 10
+HANGUP_DELAY = 6
+# Before hanging up or arming the silence watchdog, wait (at most this long)
+# for the bot's speech to finish synthesizing and playing out
+SPEECH_DRAIN_TIMEOUT = 30
+# ...and after the goodbye has played, this long for Twilio's buffer to empty
+HANGUP_GRACE = 1
+# Per-call deadlines (silence, nudge, hangup, recording polls) share one timer
+# wheel: TIMER_WHEEL_TICK seconds of resolution, TIMER_WHEEL_SLOTS buckets
+TIMER_WHEEL_TICK = float(os.getenv("TIMER_WHEEL_TICK", "0.1"))
+TIMER_WHEEL_SLOTS = int(os.getenv("TIMER_WHEEL_SLOTS", "512"))
 
-# Load prompt from external file
-with open("prompts/inbound_prompt.txt", "r", encoding="utf-8") as f:
-    PROMPT = f.read()
+# Prompts are resolved next to this file, independent of the working directory
+PROMPTS_DIR = Path(__file__).resolve().parent / "prompts"
+PROMPT_RELOAD_INTERVAL = float(os.getenv("PROMPT_RELOAD_INTERVAL", "2"))
 
-def load_description(file_path):
-    path = Path(file_path)
+def load_description(file_name):
+    path = PROMPTS_DIR / file_name
     return path.read_text(encoding="utf-8") if path.exists() else ""
 
-CONFIG = {
-  "type": "Settings",
-  "audio": {
-    "input": {
-      "encoding": "mulaw",
-      "sample_rate": 8000
-    },
-    "output": {
-      "encoding": "mulaw",
-      "sample_rate": 8000,
-      "container": "none"
-    }
-  },
-  "agent": {
-    "language": "en",
-    "listen": {
-      "provider": {
-        "type": "deepgram",
-        "model": "nova-3",
-      }
-    },
-    "think": {
-      "provider": {
-        "type": "open_ai",
-        "model": "gpt-4.1",
-        "temperature": 0.7
+def build_config():
+    """Build the Deepgram agent Settings message from the files under prompts/."""
+    prompt = (PROMPTS_DIR / "inbound_prompt.txt").read_text(encoding="utf-8")
+    return {
+      "type": "Settings",
+      "audio": {
+        "input": {
+          "encoding": "mulaw",
+          "sample_rate": 8000
+        },
+        "output": {
+          "encoding": "mulaw",
+          "sample_rate": 8000,
+          "container": "none"
+        }
       },
-      "prompt": PROMPT,
-      "functions": [
-        {
-          "name": "place_order",
-          "description": load_description("prompts/place_order.txt"),
-          "parameters": {
-            "type": "object",
-            "properties": {
-              "prior_ordered": { "type": "boolean", "description": "Whether the customer has ordered from us before"},
-              "customer_name": { "type": "string", "description": "Customer's full name"},
-              "size_yards": { "type": "string", "description": "We offer 10, 15, and 20-yard dumpsters for smaller jobs. For bigger projects, choose our 30 or 40-yard options" },
-              "delivery_date": { "type": "string", "description": "Requested delivery date" },
-              "time_slot": { "type": "string", "description": "Preferred delivery time slot"},
-              "address": { "type": "string", "description": "Full delivery address, including ZIP code"},
-              "parking_instructions": { "type": "string", "description": "Instructions on where to place the dumpster" },
-              "surface_protection": { "type": "boolean", "description": "Whether to add surface protection for $35" },
-              "contact_info": { "type": "string", "description": "Customer phone number and email" },
-              "payment_method": { "type": "string", "description": "Payment details (card number, CVC, expiration, billing address)" },
-            },
-            "required": ["prior_ordered", "customer_name", "size_yards", "time_slot", "address", "parking_instructions", "surface_protection", "contact_info", "payment_method"]
+      "agent": {
+        "language": "en",
+        "listen": {
+          "provider": {
+            "type": "deepgram",
+            "model": "nova-3",
           }
         },
-        {
-          "name": "swap_service",
-          "description": load_description("prompts/swap_service.txt"),
-          "parameters": {
-            "type": "object",
-            "properties": {
-              "customer_name": {
-                "type": "string",
-                "description": "Customer's full name"
-              },
-              "address": {
-                "type": "string",
-                "description": "Full swap address, including ZIP code"
-              },
-              "swap_time": {
-                "type": "string",
-                "description": "Requested date and time for the swap"
-              },
-              "time_slot": {
-                "type": "string",
-                "description": "Preferred time slot for the dumpster delivery"
-              },
-              "surface_protection": {
-                "type": "boolean",
-                "description": "Whether to add surface protection for $35"
-              },
-              "contact_info": {
-                "type": "string",
-                "description": "Customer phone number or email"
-              },
-              "payment_method": {
-                "type": "string",
-                "description": "Payment details (card number, CVC, expiration date, billing address)"
+        "think": {
+          "provider": {
+            "type": "open_ai",
+            "model": "gpt-4.1",
+            "temperature": 0.7
+          },
+          "prompt": prompt,
+          "functions": [
+            {
+              "name": "place_order",
+              "description": load_description("place_order.txt"),
+              "parameters": {
+                "type": "object",
+                "properties": {
+                  "prior_ordered": { "type": "boolean", "description": "Whether the customer has ordered from us before"},
+                  "customer_name": { "type": "string", "description": "Customer's full name"},
+                  "size_yards": { "type": "string", "description": "We offer 10, 15, and 20-yard dumpsters for smaller jobs. For bigger projects, choose our 30 or 40-yard options" },
+                  "delivery_date": { "type": "string", "description": "Requested delivery date" },
+                  "time_slot": { "type": "string", "description": "Preferred delivery time slot"},
+                  "address": { "type": "string", "description": "Full delivery address, including ZIP code"},
+                  "parking_instructions": { "type": "string", "description": "Instructions on where to place the dumpster" },
+                  "surface_protection": { "type": "boolean", "description": "Whether to add surface protection for $35" },
+                  "contact_info": { "type": "string", "description": "Customer phone number and email" },
+                  "payment_method": { "type": "string", "description": "Payment details (card number, CVC, expiration, billing address)" },
+                },
+                "required": ["prior_ordered", "customer_name", "size_yards", "time_slot", "address", "parking_instructions", "surface_protection", "contact_info", "payment_method"]
               }
             },
-            "required": ["customer_name", "address", "swap_time", "surface_protection", "contact_info", "payment_method",]
-          }
-        },
-        {
-          "name": "final_pickup_service",
-          "description": load_description("prompts/final_pickup_service.txt"),
-          "parameters": {
-            "type": "object",
-            "properties": {
-              "customer_name": {
-                "type": "string",
-                "description": "Customer's full name"
-              },
-              "address": {
-                "type": "string",
-                "description": "Full address for final pickup, including ZIP code"
+            {
+              "name": "swap_service",
+              "description": load_description("swap_service.txt"),
+              "parameters": {
+                "type": "object",
+                "properties": {
+                  "customer_name": {
+                    "type": "string",
+                    "description": "Customer's full name"
+                  },
+                  "address": {
+                    "type": "string",
+                    "description": "Full swap address, including ZIP code"
+                  },
+                  "swap_time": {
+                    "type": "string",
+                    "description": "Requested date and time for the swap"
+                  },
+                  "time_slot": {
+                    "type": "string",
+                    "description": "Preferred time slot for the dumpster delivery"
+                  },
+                  "surface_protection": {
+                    "type": "boolean",
+                    "description": "Whether to add surface protection for $35"
+                  },
+                  "contact_info": {
+                    "type": "string",
+                    "description": "Customer phone number or email"
+                  },
+                  "payment_method": {
+                    "type": "string",
+                    "description": "Payment details (card number, CVC, expiration date, billing address)"
+                  }
+                },
+                "required": ["customer_name", "address", "swap_time", "surface_protection", "contact_info", "payment_method",]
               }
             },
-            "required": ["customer_name", "address" ]
-          }
-        },
-        {
-          "name": "extend_rental_service",
-          "description": load_description("prompts/extend_rental_service.txt"),
-          "parameters": {
-            "type": "object",
-            "properties": {
-              "customer_name": {
-                "type": "string",
-                "description": "Customer's full name"
-              },
-              "address": {
-                "type": "string",
-                "description": "Full address for pickup, including ZIP code"
-              },
-              "extended_period": {
-                "type": "string",
-                "description": "Number of additional rental days requested"
-              },
-              "contact_info": {
-                "type": "string",
-                "description": "Customer phone number or email"
-              },
-              "payment_method": {
-                "type": "string",
-                "description": "Payment details (card number, CVC, expiration date, billing address)"
+            {
+              "name": "final_pickup_service",
+              "description": load_description("final_pickup_service.txt"),
+              "parameters": {
+                "type": "object",
+                "properties": {
+                  "customer_name": {
+                    "type": "string",
+                    "description": "Customer's full name"
+                  },
+                  "address": {
+                    "type": "string",
+                    "description": "Full address for final pickup, including ZIP code"
+                  }
+                },
+                "required": ["customer_name", "address" ]
               }
             },
+            {
+              "name": "extend_rental_service",
+              "description": load_description("extend_rental_service.txt"),
+              "parameters": {
+                "type": "object",
+                "properties": {
+                  "customer_name": {
+                    "type": "string",
+                    "description": "Customer's full name"
+                  },
+                  "address": {
+                    "type": "string",
+                    "description": "Full address for pickup, including ZIP code"
+                  },
+                  "extended_period": {
+                    "type": "string",
+                    "description": "Number of additional rental days requested"
+                  },
+                  "contact_info": {
+                    "type": "string",
+                    "description": "Customer phone number or email"
+                  },
+                  "payment_method": {
+                    "type": "string",
+                    "description": "Payment details (card number, CVC, expiration date, billing address)"
+                  }
+                },
 
-            "required": ["address", "customer_name", "extended_period", "contact_info","payment_method"]
-          }
-        },
-        {
-          "name": "delayed_pickup_service",
-          "description": load_description("prompts/delayed_pickup_service.txt"),
-          "parameters": {
-            "type": "object",
-            "properties": {
-              "address": { "type": "string", "description": "Delayed pick up address including ZIP code" },
+                "required": ["address", "customer_name", "extended_period", "contact_info","payment_method"]
+              }
             },
-            "required": ["address"]
-          }
-        },
-        {
-          "name": "get_info",
-          "description": "Provide general info about dumpster rentals: sizes, pricing, rental periods, weight limits, or surface protection.",
-          "parameters": {
-            "type": "object",
-            "properties": {
-              "info_type": { "type": "string", "enum": ["sizes", "pricing", "rental_period", "weight_limits", "surface_protection"] }
+            {
+              "name": "delayed_pickup_service",
+              "description": load_description("delayed_pickup_service.txt"),
+              "parameters": {
+                "type": "object",
+                "properties": {
+                  "address": { "type": "string", "description": "Delayed pick up address including ZIP code" },
+                },
+                "required": ["address"]
+              }
             },
-            "required": ["info_type"]
-          }
-        },
-        {
-          "name": "finish_call",
-          "description": load_description("prompts/finish_call.txt"),
-          "parameters": {
-            "type": "object",
-            "properties": {
-              "client_wants_to_finish": { "type": "boolean", "description":"Did the customer request to finish the call?" }
+            {
+              "name": "get_info",
+              "description": "Provide general info about dumpster rentals: sizes, pricing, rental periods, weight limits, or surface protection.",
+              "parameters": {
+                "type": "object",
+                "properties": {
+                  "info_type": { "type": "string", "enum": ["sizes", "pricing", "rental_period", "weight_limits", "surface_protection"] }
+                },
+                "required": ["info_type"]
+              }
             },
-            "required": ["client_wants_to_finish"]
-          }
+            {
+              "name": "finish_call",
+              "description": load_description("finish_call.txt"),
+              "parameters": {
+                "type": "object",
+                "properties": {
+                  "client_wants_to_finish": { "type": "boolean", "description":"Did the customer request to finish the call?" }
+                },
+                "required": ["client_wants_to_finish"]
+              }
+            },
+          ]
         },
-      ]
-    },
-    "greeting": "Hello, this is Chris. What can I do for you?"
-  }
-}
+        "greeting": "Hello, this is Chris. What can I do for you?"
+      }
+    }
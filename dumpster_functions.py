@@ -1,9 +1,9 @@
-import requests
 import datetime
+from outbox import OUTBOX
 
 def place_order(customer_name, size_yards, delivery_date, time_slot, prior_ordered, address, parking_instructions,
                 surface_protection, contact_info, payment_method):
-    N8N_WEBHOOK_URL = "https://vegasdumpster.app.n8n.cloud/webhook/place-order"
+    N8N_ENDPOINT = "place-order"
     """
     Create a sample dumpster order and send it to n8n webhook.
     """
@@ -22,18 +22,13 @@ def place_order(customer_name, size_yards, delivery_date, time_slot, prior_order
         "payment_method": payment_method,
     }
 
-    # Send order to n8n webhook
-    try:
-        response = requests.post(N8N_WEBHOOK_URL, json=order)
-        print("[n8n webhook] Status:", response.status_code)
-        print("[n8n webhook] Response:", response.text)
-    except Exception as e:
-        print("[n8n webhook] Error:", e)
+    # Queue order for delivery to the n8n webhook
+    OUTBOX.add(N8N_ENDPOINT, order)
 
     return order
 
 def swap_service(customer_name, swap_time, time_slot, address, surface_protection, contact_info, payment_method):
-    N8N_WEBHOOK_URL = "https://vegasdumpster.app.n8n.cloud/webhook/swap-service"
+    N8N_ENDPOINT = "swap-service"
     """
     Create a sample dumpster order and send it to n8n webhook.
     """
@@ -49,18 +44,13 @@ def swap_service(customer_name, swap_time, time_slot, address, surface_protectio
         "payment_method": payment_method,
     }
 
-    # Send order to n8n webhook
-    try:
-        response = requests.post(N8N_WEBHOOK_URL, json=order)
-        print("[n8n webhook] Status:", response.status_code)
-        print("[n8n webhook] Response:", response.text)
-    except Exception as e:
-        print("[n8n webhook] Error:", e)
+    # Queue order for delivery to the n8n webhook
+    OUTBOX.add(N8N_ENDPOINT, order)
 
     return order
 
 def final_pickup_service(customer_name, address):
-    N8N_WEBHOOK_URL = "https://vegasdumpster.app.n8n.cloud/webhook/final-pickup-service"
+    N8N_ENDPOINT = "final-pickup-service"
     """
     Create a sample dumpster order and send it to n8n webhook.
     """
@@ -71,18 +61,13 @@ def final_pickup_service(customer_name, address):
         "address": address,
     }
 
-    # Send order to n8n webhook
-    try:
-        response = requests.post(N8N_WEBHOOK_URL, json=order)
-        print("[n8n webhook] Status:", response.status_code)
-        print("[n8n webhook] Response:", response.text)
-    except Exception as e:
-        print("[n8n webhook] Error:", e)
+    # Queue order for delivery to the n8n webhook
+    OUTBOX.add(N8N_ENDPOINT, order)
 
     return order
 
 def extend_rental_service(customer_name, extended_period, address, contact_info, payment_method):
-    N8N_WEBHOOK_URL = "https://vegasdumpster.app.n8n.cloud/webhook/extend-rental-service"
+    N8N_ENDPOINT = "extend-rental-service"
     """
     Create a sample dumpster order and send it to n8n webhook.
     """
@@ -96,18 +81,13 @@ def extend_rental_service(customer_name, extended_period, address, contact_info,
         "payment_method": payment_method,
     }
 
-    # Send order to n8n webhook
-    try:
-        response = requests.post(N8N_WEBHOOK_URL, json=order)
-        print("[n8n webhook] Status:", response.status_code)
-        print("[n8n webhook] Response:", response.text)
-    except Exception as e:
-        print("[n8n webhook] Error:", e)
+    # Queue order for delivery to the n8n webhook
+    OUTBOX.add(N8N_ENDPOINT, order)
 
     return order
 
 def delayed_pickup_service(address):
-    N8N_WEBHOOK_URL = "https://vegasdumpster.app.n8n.cloud/webhook/delayed-pickup-service"
+    N8N_ENDPOINT = "delayed-pickup-service"
     """
     Create a sample dumpster order and send it to n8n webhook.
     """
@@ -117,13 +97,8 @@ def delayed_pickup_service(address):
         "address": address,
     }
 
-    # Send order to n8n webhook
-    try:
-        response = requests.post(N8N_WEBHOOK_URL, json=order)
-        print("[n8n webhook] Status:", response.status_code)
-        print("[n8n webhook] Response:", response.text)
-    except Exception as e:
-        print("[n8n webhook] Error:", e)
+    # Queue order for delivery to the n8n webhook
+    OUTBOX.add(N8N_ENDPOINT, order)
 
     return order
 
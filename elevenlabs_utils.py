@@ -1,48 +1,198 @@
 import asyncio
-import base64
-import json
+import logging
+from contextlib import aclosing
 from elevenlabs import VoiceSettings
-from elevenlabs.client import ElevenLabs
-from config import ELEVENLABS_API_KEY, ELEVENLABS_VOICE_ID
+from elevenlabs.client import AsyncElevenLabs
+from config import (
+    ELEVENLABS_API_KEY,
+    ELEVENLABS_VOICE_ID,
+    ELEVENLABS_TIMEOUT,
+    ELEVENLABS_BASE_URL,
+    TTS_CACHE_MAX_BYTES,
+    TTS_CACHE_DIR,
+    TTS_PARALLELISM,
+    TTS_HEDGE,
+    TTS_HEDGE_DEADLINE_MS,
+)
+from tts_cache import PhraseCache, cache_key
+from text_segments import split_for_tts
 
-elevenlabs = ElevenLabs(api_key=ELEVENLABS_API_KEY)
+log = logging.getLogger("elevenlabs_utils")
 
-async def stream_agent_text(text, session):
-    if not hasattr(session, "bot_speaking_count"):
-        session.bot_speaking_count = 0
+# Native async client: the HTTP stream is read by the event loop itself, so one
+# call's synthesis never stalls Twilio/Deepgram traffic of the other calls.
+elevenlabs = AsyncElevenLabs(
+    api_key=ELEVENLABS_API_KEY,
+    timeout=ELEVENLABS_TIMEOUT,
+    base_url=ELEVENLABS_BASE_URL,
+)
 
-    session.bot_speaking_count += 1
-    session.bot_speaking = True
+ELEVENLABS_MODEL_ID = "eleven_turbo_v2"
+VOICE_SETTINGS = VoiceSettings(
+    stability=1,
+    similarity_boost=1,
+    style=0.7,
+    use_speaker_boost=True,
+    speed=0.9,
+)
 
+# Greeting, pricing answers and confirmations repeat across calls; replay them
+# from memory (or disk) instead of going back to ElevenLabs every time.
+phrase_cache = PhraseCache(TTS_CACHE_MAX_BYTES, TTS_CACHE_DIR)
+CACHED_CHUNK_SIZE = 4000
+
+# Which engine voiced each hedged turn (read by the metrics gauges).
+HEDGE_STATS = {"elevenlabs": 0, "agent_audio": 0}
+
+
+async def synthesize(text):
+    """Yield ulaw_8000 audio chunks for `text`, from the phrase cache when possible."""
+    key = cache_key(text, ELEVENLABS_VOICE_ID, VOICE_SETTINGS, ELEVENLABS_MODEL_ID)
+    cached = await phrase_cache.get(key)
+    if cached is not None:
+        for i in range(0, len(cached), CACHED_CHUNK_SIZE):
+            yield cached[i:i + CACHED_CHUNK_SIZE]
+        return
+
+    chunks = []
+    async with aclosing(_synthesize_remote(text)) as remote:
+        async for chunk in remote:
+            chunks.append(chunk)
+            yield chunk
+    phrase_cache.put(key, b"".join(chunks))
+
+
+async def _synthesize_remote(text):
     response = elevenlabs.text_to_speech.stream(
         voice_id=ELEVENLABS_VOICE_ID,
         output_format="ulaw_8000",
         text=text,
-        model_id="eleven_turbo_v2",
-        voice_settings=VoiceSettings(
-            stability=1,
-            similarity_boost=1,
-            style=0.7,
-            use_speaker_boost=True,
-            speed=0.9,
-        ),
+        model_id=ELEVENLABS_MODEL_ID,
+        voice_settings=VOICE_SETTINGS,
     )
+    async with aclosing(response):
+        async for chunk in response:
+            if chunk:
+                yield chunk
+
+
+async def synthesize_segments(segments, parallelism=TTS_PARALLELISM):
+    """Yield the audio of `segments` in order, synthesizing up to `parallelism` at once.
+
+    Each segment streams into its own queue, so the first one plays as it
+    arrives while the next ones render in the background.
+    """
+    if len(segments) == 1:
+        async with aclosing(synthesize(segments[0])) as chunks:
+            async for chunk in chunks:
+                yield chunk
+        return
+
+    slots = asyncio.Semaphore(parallelism)
+    queues = [asyncio.Queue() for _ in segments]
+
+    async def render(segment, queue):
+        try:
+            async with slots:
+                async for chunk in synthesize(segment):
+                    queue.put_nowait(chunk)
+        except Exception as e:
+            queue.put_nowait(e)
+        finally:
+            queue.put_nowait(None)
+
+    tasks = [asyncio.create_task(render(segment, queue)) for segment, queue in zip(segments, queues)]
+    try:
+        for queue in queues:
+            while (chunk := await queue.get()) is not None:
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def hedged(chunks, agent_turn, deadline=TTS_HEDGE_DEADLINE_MS / 1000.0):
+    """Yield `chunks`, or the agent's own audio if `chunks` is silent past `deadline`.
+
+    After the deadline the first source to produce audio wins; the loser is
+    closed before the winner streams (ElevenLabs) or simply left unread
+    (Deepgram). An ElevenLabs error before its first byte also falls back when
+    agent audio exists.
+    """
+    chunks = aiter(chunks)
+    first = asyncio.ensure_future(anext(chunks))
+    try:
+        done, _ = await asyncio.wait({first}, timeout=deadline)
+        if not done:
+            fallback = asyncio.ensure_future(agent_turn.wait_audio())
+            await asyncio.wait({first, fallback}, return_when=asyncio.FIRST_COMPLETED)
+            use_agent_audio = not first.done() and fallback.done() and fallback.result()
+            fallback.cancel()
+            if not use_agent_audio:
+                await asyncio.wait({first})
+        else:
+            use_agent_audio = False
+
+        if not use_agent_audio and _failed(first):
+            log.warning("ElevenLabs failed before its first byte: %s", first.exception())
+            use_agent_audio = await agent_turn.wait_audio()
+            if not use_agent_audio:
+                first.result()
+
+        if use_agent_audio:
+            HEDGE_STATS["agent_audio"] += 1
+            log.warning("Falling back to agent audio (ElevenLabs deadline %.0f ms)", deadline * 1000)
+            # Stop the ElevenLabs requests now, not after the turn has played.
+            await _close(first, chunks)
+            async for chunk in agent_turn.stream():
+                yield chunk
+            return
+
+        HEDGE_STATS["elevenlabs"] += 1
+        try:
+            chunk = first.result()
+        except StopAsyncIteration:
+            return
+        yield chunk
+        async for chunk in chunks:
+            yield chunk
+    finally:
+        await _close(first, chunks)
+
+
+async def _close(first, chunks):
+    if not first.done():
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+    await chunks.aclose()
+
+
+def _failed(task):
+    return task.done() and not task.cancelled() and isinstance(task.exception(), Exception) \
+        and not isinstance(task.exception(), StopAsyncIteration)
+
 
-    audio_bytes = b""
-    for chunk in response:
-        audio_bytes += chunk
-        media_msg = {
-            "event": "media",
-            "streamSid": getattr(session.twilio_ws, "streamsid", None),
-            "media": {"payload": base64.b64encode(chunk).decode("ascii")},
-        }
-        await session.twilio_ws.send(json.dumps(media_msg))
-
-    duration_sec = len(audio_bytes) / 8000.0
-    asyncio.create_task(_mark_bot_done_after(duration_sec, session))
-
-async def _mark_bot_done_after(duration, session):
-    await asyncio.sleep(duration)
-    if hasattr(session, "bot_speaking_count") and session.bot_speaking_count > 0:
-        session.bot_speaking_count -= 1
-    session.bot_speaking = session.bot_speaking_count > 0
+async def stream_agent_text(text, session, agent_turn=None):
+    """Voice `text` on the call; `agent_turn` is Deepgram's audio for the same turn, if hedging."""
+    utterance = session.begin_utterance()
+    first = True
+    chunks = synthesize_segments(split_for_tts(text) or [text])
+    if TTS_HEDGE and agent_turn is not None:
+        chunks = hedged(chunks, agent_turn)
+    try:
+        async with aclosing(chunks):
+            async for chunk in chunks:
+                if first:
+                    first = False
+                    session.turns.mark("tts_first_byte")
+                    session.playout.notify_next_send(lambda: session.turns.mark("first_media_sent"))
+                session.playout.enqueue_audio(chunk)
+    except asyncio.CancelledError:
+        # Barge-in: the playout was cleared, so this utterance's mark never plays.
+        session.mark_played(utterance)
+        raise
+    except Exception as e:
+        log.error("Error streaming TTS: %s", e)
+    session.end_utterance(utterance)
@@ -1,12 +1,15 @@
 import json
+import logging
 from dumpster_functions import FUNCTION_MAP
 
-def execute_function_call(func_name, arguments):
+log = logging.getLogger("function_calls")
+
+async def execute_function_call(func_name, arguments):
     if func_name in FUNCTION_MAP:
         result = FUNCTION_MAP[func_name](**arguments)
-        print(f"[Function call] {func_name} result: {result}")
+        log.debug("%s result: %s", func_name, result)
         return result
-    print(f"[Function call] Unknown function: {func_name}")
+    log.warning("Unknown function: %s", func_name)
     return {"error": f"Unknown function: {func_name}"}
 
 def create_function_call_response(func_id, func_name, result):
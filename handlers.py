@@ -1,26 +1,44 @@
 import asyncio
 import json
-import base64
-import requests
-import websockets
-from requests.auth import HTTPBasicAuth
+import logging
+import time
 
-from config import CONFIG, DEEPGRAM_WS_URL, DEEPGRAM_API_KEY, TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN
+from config import STT_COALESCE_MS, STT_COALESCE_MAX_WAIT_MS, TTS_HEDGE, HANGUP_GRACE, SPEECH_DRAIN_TIMEOUT
+from agent_pool import AGENT_POOL
 from sessions import CallSession
-from elevenlabs_utils import stream_agent_text
+from audio_queue import QueueClosed
+from twilio_codec import decode_payload, parse_media
+from vad import frame_features
 from function_calls import execute_function_call, create_function_call_response
-from twilio_utils import download_twilio_recording, delete_twilio_recording
+from metrics import FUNCTION_CALL_SECONDS
+from logs import NOISY, bind_call, update_call
+
+log = logging.getLogger("handlers")
+
+# Calls currently being served by this process (read by the supervisor).
+active_calls = 0
+# Sessions of those calls, read by the metrics gauges.
+live_sessions = set()
 
 
 # ========== STS HANDLERS ==========
-async def sts_sender(sts_ws, audio_queue):
-    """Send audio chunks to Deepgram STS."""
+async def sts_sender(sts_ws, audio_queue, coalesce_ms=STT_COALESCE_MS):
+    """Send audio chunks to Deepgram STS, merged into `coalesce_ms` writes."""
+    min_bytes = coalesce_ms * 8
+    max_bytes = max(min_bytes, STT_COALESCE_MAX_WAIT_MS * 8)
+    max_wait = STT_COALESCE_MAX_WAIT_MS / 1000.0
     while True:
-        chunk = await audio_queue.get()
+        try:
+            if coalesce_ms > 20:
+                chunk = await audio_queue.get_coalesced(min_bytes, max_bytes, max_wait)
+            else:
+                chunk = await audio_queue.get()
+        except QueueClosed:
+            return
         try:
             await sts_ws.send(chunk)
         except Exception as e:
-            print(f"[sts_sender] Error sending chunk: {e}")
+            log.warning("Error sending chunk to STS: %s", e, extra=NOISY)
 
 
 async def sts_receiver(session: CallSession):
@@ -28,42 +46,44 @@ async def sts_receiver(session: CallSession):
     try:
         async for message in session.sts_ws:
             if not isinstance(message, str):
+                # Deepgram's own speech; only kept as the hedged-TTS fallback.
+                if TTS_HEDGE:
+                    session.agent_audio.feed(message)
                 continue
             try:
                 decoded = json.loads(message)
             except Exception as e:
-                print(f"[STS JSON parse error] {e}")
+                log.warning("STS JSON parse error: %s", e, extra=NOISY)
                 continue
 
             mtype = decoded.get("type")
 
             if mtype == "UserStartedSpeaking":
+                session.turns.mark("user_started_speaking")
+                session.agent_audio.end_turn()
                 session.ignore = False
-                print("\n##################################")
-                print("[Barge-in] User started speaking.")
-                if session.silence_task:
-                    session.silence_task.cancel()
-                    session.silence_task = None
+                log.info("User started speaking")
+                session.cancel_silence_timer()
 
             elif mtype == "AgentAudioDone":
-                if session.finish_call_sent:                        
-                    await asyncio.sleep(3)
+                session.turns.mark("agent_audio_done")
+                session.agent_audio.end_turn()
+                if session.finish_call_sent:
+                    # Speech runs in the background: let the goodbye finish playing.
+                    if not await session.wait_until_played():
+                        log.warning("Goodbye still playing after %ss, hanging up", SPEECH_DRAIN_TIMEOUT)
+                    await asyncio.sleep(HANGUP_GRACE)
                     await session.twilio_ws.close()
-                    await session.sts_ws.close()      
-
-                    if session.recording_sid:                  
-                        await asyncio.sleep(3)
-                        print("Finish call sent", session.recording_sid)
-                        download_twilio_recording(session.recording_sid)
-                        delete_twilio_recording(session.recording_sid)
+                    await session.sts_ws.close()
+                    session.finish_recording()
                     return
-                await session.start_silence_timer()
+                session.start_silence_timer()
 
             else:
                 await handle_text_message(decoded, session)
 
     except Exception as e:
-        print(f"[sts_receiver] Exception: {e}")
+        log.warning("STS receiver stopped: %s", e)
 
 
 # ========== FUNCTION & TEXT HANDLING ==========
@@ -75,29 +95,30 @@ async def handle_text_message(decoded, session: CallSession):
     if msg_type == "ConversationText":
         if msg_role == "assistant":
             if not session.ignore:
-                print(f"Bot: {msg_content}")
-                await stream_agent_text(msg_content, session)
+                session.turns.mark("assistant_text")
+                log.info("Bot: %s", msg_content)
+                session.speak(msg_content)
             else:
-                print("[Ignored Assistant]:", msg_content)
+                log.info("Ignored assistant text: %s", msg_content)
         else:
+            session.turns.mark("user_text")
             if session.bot_speaking:
                 session.interupt_word = msg_content
-                print("[LOG] Bot was interrupted:", session.interupt_word)
-
-                if len(session.interupt_word.split()) < 2:
+                log.info("Bot was interrupted: %s", session.interupt_word)
+
+                if session.vad is not None:
+                    # The VAD already cleared playout on a real interruption;
+                    # otherwise the speech was too short to count.
+                    if not session.vad_barged_in:
+                        session.ignore = True
+                        log.info("Interruption ignored, speech too short: %s", session.interupt_word)
+                elif len(session.interupt_word.split()) < 2:
                     session.ignore = True
-                    print("[Ignored] Too few words:", session.interupt_word)
+                    log.info("Interruption ignored, too few words: %s", session.interupt_word)
                 else:
-                    clear_message = {
-                        "event": "clear",
-                        "streamSid": getattr(session.twilio_ws, "streamsid", None),
-                    }
-                    try:
-                        await session.twilio_ws.send(json.dumps(clear_message))
-                    except:
-                        pass
+                    await session.clear_playout()
 
-            print(f"User: {msg_content}\n{'#'*34}\n")
+            log.info("User: %s", msg_content)
 
     if msg_type == "FunctionCallRequest":
         await handle_function_call_request(decoded, session)
@@ -109,92 +130,122 @@ async def handle_function_call_request(decoded, session: CallSession):
         func_id = function_call["id"]
         arguments = json.loads(function_call["arguments"])
 
-        print(f"[FunctionCallRequest] {func_name}, args={arguments}")
-        result = execute_function_call(func_name, arguments)
+        log.info("Function call request: %s", func_name)
+        log.debug("Function call arguments: %s", arguments)
+        started = time.monotonic()
+        result = await execute_function_call(func_name, arguments)
+        FUNCTION_CALL_SECONDS.observe(time.monotonic() - started, func_name)
         response = create_function_call_response(func_id, func_name, result)
 
         if func_name == "finish_call" and arguments.get("client_wants_to_finish", False):
             session.finish_call_sent = True
-            print("[FunctionCallResponse] finish_call set")
+            log.info("finish_call set")
 
         try:
             await session.sts_ws.send(json.dumps(response))
         except Exception as e:
-            print(f"[FunctionCallResponse] Error sending: {e}")
+            log.warning("Error sending function call response: %s", e)
 
 
 # ========== TWILIO HANDLERS ==========
+async def handle_inbound_audio(audio, audio_queue, session: CallSession):
+    if session.vad is None and session.silence_gate is None:
+        audio_queue.put_nowait(audio)
+        return
+    energy_db, zcr = frame_features(audio)
+    if session.silence_gate is not None:
+        audio = session.silence_gate.admit(audio, energy_db)
+    if audio:
+        audio_queue.put_nowait(audio)
+    if session.vad is not None and session.caller_barged_in(energy_db, zcr):
+        await session.clear_playout()
+
+
 async def twilio_receiver(twilio_ws, audio_queue, session: CallSession):
     """Receive audio/events from Twilio websocket."""
     try:
         async for message in twilio_ws:
             try:
+                media = parse_media(message)
+                if media is not None:
+                    track, payload = media
+                    if track == "inbound":
+                        await handle_inbound_audio(decode_payload(payload), audio_queue, session)
+                    continue
+
                 data = json.loads(message)
                 event = data.get("event")
 
                 if event == "start":
-                    print(f"[Twilio Receiver] Stream started: {data['start']}")
                     twilio_ws.streamsid = data["start"]["streamSid"]
                     session.call_sid = data["start"]["callSid"]
+                    update_call(call_sid=session.call_sid, stream_sid=twilio_ws.streamsid)
+                    log.info("Stream started", extra={"start": data["start"]})
 
-                    # Start Twilio recording
-                    if session.call_sid:
-                        url = f"https://api.twilio.com/2010-04-01/Accounts/{TWILIO_ACCOUNT_SID}/Calls/{session.call_sid}/Recordings.json"
-                        response = requests.post(url, auth=HTTPBasicAuth(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN))
-                        if response.status_code in [200, 201]:
-                            recording_data = response.json()
-                            session.recording_sid = recording_data.get("sid")
-                            print(f"[Recording] Started, SID: {session.recording_sid}")
-                        else:
-                            print(f"[Recording] Failed: {response.status_code} {response.text}")
+                    session.start_recording()
 
                 elif event == "media":
                     media = data["media"]
-                    chunk = base64.b64decode(media["payload"])
                     if media.get("track") == "inbound":
-                        audio_queue.put_nowait(chunk)
+                        await handle_inbound_audio(decode_payload(media["payload"]), audio_queue, session)
+
+                elif event == "mark":
+                    session.mark_played(data["mark"]["name"])
 
                 elif event == "stop":
-                    if session.silence_task:
-                        session.silence_task.cancel()
-                    print("[Twilio Receiver] Stream stopped.")
+                    session.cancel_silence_timer()
+                    log.info("Stream stopped")
                     await session.twilio_ws.close()
                     await session.sts_ws.close()
+                    session.finish_recording()
                     break
 
             except Exception as e:
-                print(f"[Twilio Receiver Error] {e}")
+                log.warning("Error handling Twilio message: %s", e)
                 break
     except Exception as e:
-        print(f"[twilio_receiver] Exception: {e}")
+        log.warning("Twilio receiver stopped: %s", e)
+    finally:
+        audio_queue.close()
 
 
 async def twilio_handler(twilio_ws):
     """Main entrypoint per Twilio websocket connection."""
-    audio_queue = asyncio.Queue()
+    global active_calls
     session = None
+    active_calls += 1
+    bind_call(call_sid=None, stream_sid=None)
 
     try:
-        async with websockets.connect(
-            DEEPGRAM_WS_URL,
-            extra_headers={"Authorization": f"Token {DEEPGRAM_API_KEY}"}
-        ) as sts_ws:
-            await sts_ws.send(json.dumps(CONFIG))
-            print("[Twilio Handler] Sent STS config.")
-
+        sts_ws = await AGENT_POOL.acquire()
+        log.debug("Claimed configured STS session")
+        try:
             session = CallSession(twilio_ws, sts_ws)
+            live_sessions.add(session)
 
             await asyncio.gather(
-                sts_sender(sts_ws, audio_queue),
+                sts_sender(sts_ws, session.audio_queue),
                 sts_receiver(session),
-                twilio_receiver(twilio_ws, audio_queue, session),
+                twilio_receiver(twilio_ws, session.audio_queue, session),
                 return_exceptions=True,
             )
+        finally:
+            await sts_ws.close()
 
     except Exception as e:
-        print(f"[Twilio Handler] Exception: {e}")
+        log.exception("Call handler failed: %s", e)
         if session and session.twilio_ws:
             try:
                 await session.twilio_ws.close()
             except:
                 pass
+    finally:
+        active_calls -= 1
+        if session:
+            if session.silence_gate is not None:
+                frames_per_send = max(1, STT_COALESCE_MS // 20)
+                log.info("Silence suppression saved", extra=session.silence_gate.stats(frames_per_send))
+            live_sessions.discard(session)
+            session.cancel_timers()
+            session.cancel_speech()
+            session.playout.close()
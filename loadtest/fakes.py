@@ -0,0 +1,253 @@
+"""Local stand-ins for the services a call talks to.
+
+- FakeAgentServer: the Deepgram agent websocket. Answers Settings with the
+  greeting, then plays a scripted conversation driven by how much caller audio
+  it has received (one user turn every `turn_seconds` of audio).
+- FakeHTTPServices: ElevenLabs streaming TTS, the n8n webhooks and the Twilio
+  Recordings REST API, on one threaded stdlib HTTP server.
+- FakeWebhookServer: a scriptable n8n stub (per-endpoint status sequences and
+  delays) that records every request, for exercising webhooks.py.
+"""
+import asyncio
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import websockets
+
+USER_LINES = [
+    "Hi, I need a dumpster for a kitchen remodel.",
+    "What sizes do you have?",
+    "Twenty yards should be fine, how much is it?",
+    "Can you deliver it tomorrow morning?",
+]
+ASSISTANT_LINES = [
+    "Sure, I can help with that. What size are you looking for?",
+    "We have ten, fifteen, twenty, thirty and forty yard dumpsters.",
+    "Got it. Can I get the delivery address, including the ZIP code?",
+    "Perfect. Is there anything else I can help you with today?",
+]
+
+
+class FakeAgentServer:
+    def __init__(self, port, turn_seconds=8.0, think_seconds=0.3, function_every=3, agent_audio=True):
+        self.port = port
+        self.agent_audio = agent_audio
+        self.turn_bytes = int(turn_seconds * 8000)
+        self.think_seconds = think_seconds
+        self.function_every = function_every
+        self.server = None
+
+    async def start(self):
+        self.server = await websockets.serve(self.handle, "127.0.0.1", self.port, compression=None)
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, ws):
+        await ws.send(json.dumps({"type": "Welcome", "request_id": uuid.uuid4().hex}))
+        received = 0
+        turn = 0
+        pending_functions = {}
+        try:
+            async for message in ws:
+                if isinstance(message, bytes):
+                    received += len(message)
+                    if received >= (turn + 1) * self.turn_bytes:
+                        turn += 1
+                        asyncio.create_task(self.user_turn(ws, turn, pending_functions))
+                    continue
+                data = json.loads(message)
+                mtype = data.get("type")
+                if mtype == "Settings":
+                    await ws.send(json.dumps({"type": "SettingsApplied"}))
+                    greeting = data["agent"].get("greeting", "Hello")
+                    await self.assistant_says(ws, greeting)
+                elif mtype == "FunctionCallResponse":
+                    waiter = pending_functions.pop(data.get("id"), None)
+                    if waiter and not waiter.done():
+                        waiter.set_result(data)
+        except websockets.ConnectionClosed:
+            pass
+
+    async def assistant_says(self, ws, text):
+        await ws.send(json.dumps({"type": "ConversationText", "role": "assistant", "content": text}))
+        seconds = min(3.0, len(text) * 0.06)
+        started = time.monotonic()
+        if self.agent_audio:
+            # The agent's own speech, mu-law 8 kHz, faster than real time.
+            total = int(seconds * 8000)
+            for offset in range(0, total, 1600):
+                await ws.send(b"\xff" * min(1600, total - offset))
+                await asyncio.sleep(0.05)
+        await asyncio.sleep(max(0.0, seconds - (time.monotonic() - started)))
+        await ws.send(json.dumps({"type": "AgentAudioDone"}))
+
+    async def user_turn(self, ws, turn, pending_functions):
+        try:
+            await ws.send(json.dumps({"type": "UserStartedSpeaking"}))
+            line = USER_LINES[turn % len(USER_LINES)]
+            await ws.send(json.dumps({"type": "ConversationText", "role": "user", "content": line}))
+            await asyncio.sleep(self.think_seconds)
+            if self.function_every and turn % self.function_every == 0:
+                func_id = uuid.uuid4().hex
+                waiter = asyncio.get_running_loop().create_future()
+                pending_functions[func_id] = waiter
+                await ws.send(json.dumps({
+                    "type": "FunctionCallRequest",
+                    "functions": [{
+                        "id": func_id,
+                        "name": "delayed_pickup_service",
+                        "arguments": json.dumps({"address": "123 Main St, Las Vegas, NV 89101"}),
+                        "client_side": True,
+                    }],
+                }))
+                await asyncio.wait_for(waiter, 10.0)
+            await self.assistant_says(ws, ASSISTANT_LINES[turn % len(ASSISTANT_LINES)])
+        except (websockets.ConnectionClosed, asyncio.TimeoutError):
+            pass
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    tts_first_byte = 0.15
+    tts_chunk_bytes = 1600
+    tts_realtime_factor = 4.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _reply(self, status, payload=b"", content_type="application/json"):
+        if isinstance(payload, (dict, list)):
+            payload = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        body = self._body()
+        if re.match(r"^/v1/text-to-speech/[^/]+/stream", self.path):
+            return self._stream_tts(json.loads(body or b"{}").get("text", ""))
+        if re.match(r"^/2010-04-01/Accounts/[^/]+/Calls/[^/]+/Recordings\.json", self.path):
+            return self._reply(201, {"sid": "RE" + uuid.uuid4().hex})
+        # Anything else is treated as an n8n webhook.
+        self._reply(200, {"ok": True})
+
+    def do_GET(self):
+        if re.match(r"^/2010-04-01/Accounts/[^/]+/Recordings/[^/.]+\.json", self.path):
+            return self._reply(200, {"status": "completed"})
+        if re.match(r"^/2010-04-01/Accounts/[^/]+/Recordings/[^/.]+\.wav", self.path):
+            return self._reply(200, b"RIFF" + b"\0" * 4096, "audio/wav")
+        self._reply(404, {"error": "not found"})
+
+    def do_DELETE(self):
+        self.send_response(204)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _stream_tts(self, text):
+        # Roughly 60 ms of speech per character, delivered faster than real time.
+        total = int(min(3.0, max(0.5, len(text) * 0.06)) * 8000)
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/basic")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        time.sleep(self.tts_first_byte)
+        sent = 0
+        while sent < total:
+            size = min(self.tts_chunk_bytes, total - sent)
+            self.wfile.write(f"{size:x}\r\n".encode() + b"\xff" * size + b"\r\n")
+            self.wfile.flush()
+            sent += size
+            time.sleep(size / 8000.0 / self.tts_realtime_factor)
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+class FakeHTTPServices:
+    def __init__(self, port):
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        status = self.server.fake.handle(self.path.lstrip("/"), dict(self.headers), body)
+        payload = json.dumps({"ok": status < 400}).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except OSError:
+            # The client gave up (timeout) while we were sleeping.
+            pass
+
+
+class FakeWebhookServer:
+    """n8n stand-in. `statuses[endpoint]` is replied in order (the last one
+    repeats), after `delays[endpoint]` seconds; `requests` records
+    (endpoint, headers, body) and `peak` the most requests in flight at once."""
+
+    def __init__(self, port=0):
+        self.statuses = {}
+        self.delays = {}
+        self.requests = []
+        self.in_flight = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), _WebhookHandler)
+        self.server.daemon_threads = True
+        self.server.fake = self
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def handle(self, endpoint, headers, body):
+        with self.lock:
+            self.requests.append((endpoint, headers, body))
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            statuses = self.statuses.get(endpoint, [200])
+            status = statuses.pop(0) if len(statuses) > 1 else statuses[0]
+        try:
+            time.sleep(self.delays.get(endpoint, 0.0))
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+        return status
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,336 @@
+"""Load generator: N simulated phone calls against a local app.py process.
+
+Starts the app in a child process with every external service pointed at local
+fakes (see loadtest/fakes.py), then acts as Twilio: each call sends
+connected/start, real-time 20 ms media frames from recorded mu-law, echoes
+marks as the audio would finish playing, and sends stop at the end. Reports
+time-to-greeting and turn latency percentiles, app event-loop lag, and CPU and
+RSS per call.
+
+    python -m loadtest.run --calls 50 --ramp 5 --seconds 60
+"""
+import argparse
+import asyncio
+import bisect
+import json
+import multiprocessing
+import os
+import signal
+import statistics
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import websockets
+
+from loadtest.fakes import FakeAgentServer, FakeHTTPServices
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+AUDIO_FILES = sorted((REPO_DIR / "deepgram_tts").glob("*.ulaw"))
+FRAME_BYTES = 160
+SILENCE = b"\xff" * FRAME_BYTES
+TALK_WINDOW = (0.25, 0.85)  # fraction of each turn the caller spends talking
+FRAME_SECONDS = 0.02
+LAG_PROBE_INTERVAL = 0.05
+
+
+# ---------- app under test (child process) ----------
+def _run_app(lag_queue, log_path):
+    import sys
+    sys.stdout = sys.stderr = open(log_path, "w", buffering=1)
+    os.chdir(REPO_DIR)
+    import app
+
+    async def probe():
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(LAG_PROBE_INTERVAL)
+            lag_queue.put((loop.time() - start - LAG_PROBE_INTERVAL) * 1000.0)
+
+    async def main():
+        task = asyncio.create_task(probe())
+        try:
+            await app.serve()
+        finally:
+            task.cancel()
+
+    asyncio.run(main())
+
+
+def _proc_sample(pid):
+    """(cpu seconds, rss bytes) of `pid` from /proc (Linux only)."""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    ticks = os.sysconf("SC_CLK_TCK")
+    cpu = (int(fields[11]) + int(fields[12])) / ticks
+    with open(f"/proc/{pid}/statm") as f:
+        rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    return cpu, rss
+
+
+# ---------- simulated Twilio side ----------
+class CallResult:
+    def __init__(self):
+        self.greeting_ms = None
+        self.turn_ms = []
+        self.frames_received = 0
+        self.error = None
+
+
+async def simulate_call(url, audio, seconds, turn_seconds):
+    result = CallResult()
+    stream_sid = "MZ" + uuid.uuid4().hex
+    call_sid = "CA" + uuid.uuid4().hex
+    arrivals = []
+    playback = {"until": 0.0}
+    try:
+        async with websockets.connect(url, compression=None) as ws:
+            connected_at = time.monotonic()
+            await ws.send(json.dumps({"event": "connected", "protocol": "Call", "version": "1.0.0"}))
+            await ws.send(json.dumps({
+                "event": "start",
+                "sequenceNumber": "1",
+                "start": {
+                    "streamSid": stream_sid,
+                    "callSid": call_sid,
+                    "accountSid": "AC" + "0" * 32,
+                    "tracks": ["inbound"],
+                    "mediaFormat": {"encoding": "audio/x-mulaw", "sampleRate": 8000, "channels": 1},
+                },
+                "streamSid": stream_sid,
+            }))
+            receiver = asyncio.create_task(_receive(ws, stream_sid, arrivals, playback))
+
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            frames = int(seconds / FRAME_SECONDS)
+            for i in range(frames):
+                await asyncio.sleep(max(0.0, start + i * FRAME_SECONDS - loop.time()))
+                offset = (i * FRAME_BYTES) % (len(audio) - FRAME_BYTES)
+                # A polite caller: talks in the middle of each turn, leaves a
+                # gap for the reply, and stays silent while the bot is playing.
+                position = (i * FRAME_SECONDS) % turn_seconds / turn_seconds
+                talking = TALK_WINDOW[0] <= position < TALK_WINDOW[1]
+                if talking and time.monotonic() >= playback["until"]:
+                    frame = audio[offset:offset + FRAME_BYTES]
+                else:
+                    frame = SILENCE
+                await ws.send(json.dumps({
+                    "event": "media",
+                    "sequenceNumber": str(i + 2),
+                    "media": {
+                        "track": "inbound",
+                        "chunk": str(i + 1),
+                        "timestamp": str(i * 20),
+                        "payload": _b64(frame),
+                    },
+                    "streamSid": stream_sid,
+                }, separators=(",", ":")))
+            await ws.send(json.dumps({"event": "stop", "sequenceNumber": str(frames + 2), "streamSid": stream_sid}))
+            await asyncio.sleep(0.5)
+            receiver.cancel()
+    except Exception as e:
+        result.error = repr(e)
+
+    result.frames_received = len(arrivals)
+    if arrivals:
+        result.greeting_ms = (arrivals[0] - connected_at) * 1000.0
+        # Caller audio started right after `start`; the fake agent ends user
+        # turn k once it has received k * turn_seconds of it.
+        sent_start = connected_at
+        k = 1
+        while sent_start + k * turn_seconds < arrivals[-1]:
+            turn_end = sent_start + k * turn_seconds
+            i = bisect.bisect_left(arrivals, turn_end)
+            if i < len(arrivals):
+                result.turn_ms.append((arrivals[i] - turn_end) * 1000.0)
+            k += 1
+    return result
+
+
+def _b64(data):
+    import base64
+    return base64.b64encode(data).decode("ascii")
+
+
+async def _receive(ws, stream_sid, arrivals, playback):
+    """Record outbound media arrivals and echo marks when their audio would have played."""
+    play_until = 0.0
+    loop = asyncio.get_running_loop()
+    pending = []
+
+    def echo(name):
+        return ws.send(json.dumps({"event": "mark", "streamSid": stream_sid, "mark": {"name": name}}))
+
+    async for message in ws:
+        now = time.monotonic()
+        data = json.loads(message)
+        event = data.get("event")
+        if event == "media":
+            arrivals.append(now)
+            play_until = max(play_until, now) + FRAME_SECONDS
+            playback["until"] = play_until
+        elif event == "mark":
+            name = data["mark"]["name"]
+            handle = loop.call_later(max(0.0, play_until - now),
+                                     lambda n=name: asyncio.ensure_future(echo(n)))
+            pending.append((handle, name))
+        elif event == "clear":
+            play_until = now
+            playback["until"] = now
+            for handle, name in pending:
+                if not handle.cancelled():
+                    handle.cancel()
+                    await echo(name)
+            pending.clear()
+
+
+# ---------- orchestration ----------
+def _percentiles(values):
+    if not values:
+        return {}
+    values = sorted(values)
+    pick = lambda q: values[min(len(values) - 1, int(q * len(values)))]
+    return {"p50": pick(0.50), "p90": pick(0.90), "p99": pick(0.99), "max": values[-1],
+            "mean": statistics.fmean(values), "count": len(values)}
+
+
+async def run_load(args, app_pid, lag_queue):
+    audio = b"".join(path.read_bytes() for path in AUDIO_FILES)
+    url = f"ws://127.0.0.1:{args.port}"
+
+    samples = []
+    lags = []
+    stop_sampling = asyncio.Event()
+
+    async def sample():
+        while not stop_sampling.is_set():
+            samples.append((time.monotonic(), *_proc_sample(app_pid)))
+            while not lag_queue.empty():
+                lags.append(lag_queue.get_nowait())
+            await asyncio.sleep(1.0)
+
+    await asyncio.sleep(2.0)  # let the app start and pre-warm its agent pool
+    baseline_cpu_t = time.monotonic()
+    baseline_cpu, baseline_rss = _proc_sample(app_pid)
+    while not lag_queue.empty():
+        lag_queue.get_nowait()
+    sampler = asyncio.create_task(sample())
+
+    calls = []
+    for i in range(args.calls):
+        calls.append(asyncio.create_task(simulate_call(url, audio, args.seconds, args.turn_seconds)))
+        await asyncio.sleep(1.0 / args.ramp)
+    results = await asyncio.gather(*calls)
+    stop_sampling.set()
+    await sampler
+
+    end_t, end_cpu, _ = samples[-1]
+    peak_rss = max(rss for _, _, rss in samples)
+    call_seconds = args.calls * args.seconds
+    turns = [ms for r in results for ms in r.turn_ms]
+    report = {
+        "calls": args.calls,
+        "failed_calls": sum(1 for r in results if r.error or not r.frames_received),
+        "errors": sorted({r.error for r in results if r.error})[:5],
+        "greeting_ms": _percentiles([r.greeting_ms for r in results if r.greeting_ms is not None]),
+        "turn_latency_ms": _percentiles(turns),
+        "event_loop_lag_ms": _percentiles(lags),
+        "cpu_percent_total": 100.0 * (end_cpu - baseline_cpu) / (end_t - baseline_cpu_t),
+        "cpu_ms_per_call_second": 1000.0 * (end_cpu - baseline_cpu) / call_seconds,
+        "rss_baseline_mb": baseline_rss / 2**20,
+        "rss_peak_mb": peak_rss / 2**20,
+        "rss_per_call_kb": (peak_rss - baseline_rss) / 1024.0 / args.calls,
+    }
+    return report
+
+
+def _print_report(report):
+    def fmt(p):
+        if not p:
+            return "n/a"
+        return (f"p50={p['p50']:.0f} p90={p['p90']:.0f} p99={p['p99']:.0f} "
+                f"max={p['max']:.0f} (n={p['count']})")
+
+    print(f"calls:            {report['calls']} ({report['failed_calls']} failed)")
+    for error in report["errors"]:
+        print(f"  error: {error}")
+    print(f"time to greeting: {fmt(report['greeting_ms'])} ms")
+    print(f"turn latency:     {fmt(report['turn_latency_ms'])} ms")
+    print(f"event-loop lag:   {fmt(report['event_loop_lag_ms'])} ms")
+    print(f"cpu:              {report['cpu_percent_total']:.1f}% total, "
+          f"{report['cpu_ms_per_call_second']:.2f} ms per call-second")
+    print(f"rss:              {report['rss_baseline_mb']:.1f} MB -> {report['rss_peak_mb']:.1f} MB, "
+          f"{report['rss_per_call_kb']:.0f} KB per call")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent Twilio calls against app.py")
+    parser.add_argument("--calls", type=int, default=20, help="concurrent calls to ramp up to")
+    parser.add_argument("--ramp", type=float, default=5.0, help="new calls per second")
+    parser.add_argument("--seconds", type=float, default=40.0, help="caller audio per call")
+    parser.add_argument("--turn-seconds", type=float, default=8.0, help="caller audio per user turn")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--agent-port", type=int, default=8791)
+    parser.add_argument("--http-port", type=int, default=8792)
+    parser.add_argument("--no-tts-cache", action="store_true")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="loadtest-")
+    http_base = f"http://127.0.0.1:{args.http_port}"
+    os.environ.update({
+        "SERVER_HOST": "127.0.0.1",
+        "SERVER_PORT": str(args.port),
+        "DEEPGRAM_WS_URL": f"ws://127.0.0.1:{args.agent_port}",
+        "DEEPGRAM_API_KEY": "loadtest",
+        "ELEVENLABS_BASE_URL": http_base,
+        "ELEVENLABS_API_KEY": "loadtest",
+        "ELEVENLABS_VOICE_ID": "loadtest",
+        "N8N_WEBHOOK_BASE": http_base,
+        "TWILIO_API_URL": http_base,
+        "TWILIO_ACCOUNT_SID": "AC" + "0" * 32,
+        "TWILIO_AUTH_TOKEN": "loadtest",
+        "OUTBOX_PATH": os.path.join(workdir, "outbox.sqlite3"),
+        "RECORDINGS_DIR": os.path.join(workdir, "recording"),
+        "WORKER_DRAIN_TIMEOUT": "5",
+    })
+    if args.no_tts_cache:
+        os.environ["TTS_CACHE_MAX_BYTES"] = "0"
+
+    http = FakeHTTPServices(args.http_port)
+    http.start()
+    agent = FakeAgentServer(args.agent_port, turn_seconds=args.turn_seconds)
+
+    ctx = multiprocessing.get_context("spawn")
+    lag_queue = ctx.Queue()
+    app_log = os.path.join(workdir, "app.log")
+    app_process = ctx.Process(target=_run_app, args=(lag_queue, app_log))
+
+    async def orchestrate():
+        await agent.start()
+        app_process.start()
+        try:
+            return await run_load(args, app_process.pid, lag_queue)
+        finally:
+            os.kill(app_process.pid, signal.SIGTERM)
+            await asyncio.get_running_loop().run_in_executor(None, app_process.join, 15)
+            await agent.stop()
+
+    try:
+        report = asyncio.run(orchestrate())
+    finally:
+        if app_process.is_alive():
+            app_process.kill()
+        http.stop()
+
+    _print_report(report)
+    print(f"app log:          {app_log}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
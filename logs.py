@@ -0,0 +1,153 @@
+import contextvars
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+
+from config import LOG_LEVEL, LOG_LEVELS, LOG_FORMAT, LOG_QUEUE_SIZE, LOG_RATE_LIMIT, LOG_RATE_WINDOW
+
+# Per-call correlation. twilio_handler binds a fresh dict before spawning the
+# call's tasks; they all inherit the same dict, so fields filled in later
+# (callSid/streamSid from the Twilio start event) tag every task's records.
+call_context = contextvars.ContextVar("call_context", default=None)
+
+# Pass as `extra=` on noisy events to cap them at LOG_RATE_LIMIT records per
+# LOG_RATE_WINDOW seconds for each (logger, message template) pair.
+NOISY = {"rate_limited": True}
+
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+def bind_call(**fields):
+    """Start a new correlation context for the current task and its children."""
+    context = dict(fields)
+    call_context.set(context)
+    return context
+
+
+def update_call(**fields):
+    context = call_context.get()
+    if context is not None:
+        context.update(fields)
+
+
+class ContextFilter(logging.Filter):
+    """Copy the call context onto the record in the logging thread of origin."""
+
+    def filter(self, record):
+        context = call_context.get()
+        if context:
+            for key, value in context.items():
+                if value is not None:
+                    setattr(record, key, value)
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """Drop records marked NOISY beyond `limit` per `window` seconds per template.
+
+    The first record let through after suppression carries a `suppressed`
+    count so nothing disappears silently.
+    """
+
+    def __init__(self, limit=LOG_RATE_LIMIT, window=LOG_RATE_WINDOW):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self.buckets = {}
+
+    def filter(self, record):
+        if not getattr(record, "rate_limited", False) or self.limit <= 0:
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        bucket = self.buckets.get(key)
+        if bucket is None or now - bucket[0] >= self.window:
+            suppressed = bucket[2] if bucket else 0
+            self.buckets[key] = [now, 1, 0]
+        elif bucket[1] < self.limit:
+            bucket[1] += 1
+            suppressed = 0
+        else:
+            bucket[2] += 1
+            return False
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Never block the event loop: when the queue is full, count and drop."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED and key != "rate_limited":
+                entry[key] = value
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record):
+        line = f"{self.formatTime(record, '%H:%M:%S')} {record.levelname:<7} [{record.name}] {record.getMessage()}"
+        extras = [f"{key}={value}" for key, value in vars(record).items()
+                  if key not in _RESERVED and key != "rate_limited"]
+        return f"{line} ({' '.join(extras)})" if extras else line
+
+
+class LogPipeline:
+    """Root logger -> bounded queue -> background thread -> stdout."""
+
+    def __init__(self):
+        self.handler = None
+        self.listener = None
+
+    def start(self):
+        if self.listener:
+            return
+        root = logging.getLogger()
+        root.setLevel(LOG_LEVEL)
+        for spec in filter(None, (part.strip() for part in LOG_LEVELS.split(","))):
+            name, _, level = spec.partition("=")
+            logging.getLogger(name.strip()).setLevel(level.strip().upper())
+
+        output = logging.StreamHandler(sys.stdout)
+        output.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter())
+        self.handler = DroppingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+        self.handler.addFilter(RateLimitFilter())
+        self.handler.addFilter(ContextFilter())
+        self.listener = logging.handlers.QueueListener(self.handler.queue, output)
+        root.handlers = [self.handler]
+        self.listener.start()
+
+    def stop(self):
+        """Flush what is queued and stop the writer thread."""
+        if self.listener:
+            self.listener.stop()
+            self.listener = None
+
+    @property
+    def dropped(self):
+        return self.handler.dropped if self.handler else 0
+
+
+LOGGING = LogPipeline()
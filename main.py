@@ -5,7 +5,7 @@ import websockets
 import os
 from datetime import datetime
 from dumpster_functions import FUNCTION_MAP
-from config import CONFIG
+from agent_settings import AGENT_SETTINGS
 import os
 from datetime import datetime
 from zoneinfo import ZoneInfo
@@ -369,7 +369,7 @@ async def twilio_handler(twilio_ws):
             DEEPGRAM_WS_URL,
             extra_headers={"Authorization": f"Token {DEEPGRAM_API_KEY}"}
         ) as sts_ws:
-            await sts_ws.send(json.dumps(CONFIG))
+            await sts_ws.send(AGENT_SETTINGS.payload)
             print("[Twilio Handler] Sent STS config.")
 
             session = CallSession(twilio_ws, sts_ws)
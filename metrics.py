@@ -0,0 +1,183 @@
+import asyncio
+import bisect
+import logging
+import time
+
+from config import METRICS_HOST
+
+log = logging.getLogger("metrics")
+
+DEFAULT_BUCKETS = (0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0)
+LOOP_LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+LOOP_LAG_INTERVAL = 0.1
+
+
+class Histogram:
+    def __init__(self, name, help, label=None, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.buckets = buckets
+        # label value -> [bucket counts..., sum, count]
+        self.series = {}
+
+    def observe(self, value, label_value=None):
+        series = self.series.get(label_value)
+        if series is None:
+            series = self.series[label_value] = [0] * (len(self.buckets) + 2)
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label_value, series in sorted(self.series.items(), key=lambda item: str(item[0])):
+            prefix = f'{self.label}="{label_value}",' if self.label else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {series[-1]}')
+            labels = f"{{{prefix[:-1]}}}" if prefix else ""
+            lines.append(f"{self.name}_sum{labels} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{labels} {series[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.histograms = []
+        # (name, help, type, read) for values read at scrape time
+        self.callbacks = []
+
+    def histogram(self, *args, **kwargs):
+        histogram = Histogram(*args, **kwargs)
+        self.histograms.append(histogram)
+        return histogram
+
+    def gauge(self, name, help, read):
+        """Register a gauge whose value is read from `read()` at scrape time."""
+        self.callbacks.append((name, help, "gauge", read))
+
+    def counter(self, name, help, read):
+        """Like gauge(), for a process-wide total that only ever increases."""
+        self.callbacks.append((name, help, "counter", read))
+
+    def render(self):
+        lines = []
+        for histogram in self.histograms:
+            lines.extend(histogram.render())
+        for name, help, kind, read in self.callbacks:
+            try:
+                value = read()
+            except Exception:
+                continue
+            lines.extend([f"# HELP {name} {help}", f"# TYPE {name} {kind}", f"{name} {value}"])
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+TURN_STAGE_SECONDS = REGISTRY.histogram(
+    "voice_turn_stage_seconds",
+    "Time between per-turn events on a call, by stage.",
+    label="stage",
+)
+FUNCTION_CALL_SECONDS = REGISTRY.histogram(
+    "voice_function_call_seconds",
+    "Duration of agent function calls, by function.",
+    label="function",
+)
+EVENT_LOOP_LAG_SECONDS = REGISTRY.histogram(
+    "voice_event_loop_lag_seconds",
+    "How late a periodic event-loop timer fires.",
+    buckets=LOOP_LAG_BUCKETS,
+)
+
+# stage -> (start event, end event)
+TURN_STAGES = {
+    "user_transcript": ("user_started_speaking", "user_text"),
+    "think": ("user_text", "assistant_text"),
+    "tts_first_byte": ("assistant_text", "tts_first_byte"),
+    "first_audio": ("assistant_text", "first_media_sent"),
+    "time_to_first_audio": ("user_text", "first_media_sent"),
+    "agent_audio_done": ("assistant_text", "agent_audio_done"),
+}
+_STAGES_BY_START = {}
+_STAGES_BY_END = {}
+for _stage, (_start, _end) in TURN_STAGES.items():
+    _STAGES_BY_START.setdefault(_start, []).append(_stage)
+    _STAGES_BY_END.setdefault(_end, []).append(_stage)
+
+
+class TurnTimer:
+    """Per-call turn event timestamps feeding the stage histograms.
+
+    A start event arms every stage it begins (the latest start wins); the next
+    matching end event observes the elapsed time and disarms the stage.
+    """
+
+    def __init__(self):
+        self.armed = {}
+
+    def mark(self, event):
+        now = time.monotonic()
+        for stage in _STAGES_BY_END.get(event, ()):
+            start = self.armed.pop(stage, None)
+            if start is not None:
+                TURN_STAGE_SECONDS.observe(now - start, stage)
+        for stage in _STAGES_BY_START.get(event, ()):
+            self.armed[stage] = now
+
+
+async def _loop_lag_probe():
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        EVENT_LOOP_LAG_SECONDS.observe(max(0.0, loop.time() - start - LOOP_LAG_INTERVAL))
+
+
+async def _handle_http(reader, writer):
+    try:
+        request_line = await reader.readline()
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+            pass
+        parts = request_line.decode("latin-1").split()
+        if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+            status, body = "200 OK", REGISTRY.render().encode()
+        else:
+            status, body = "404 Not Found", b"not found\n"
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+    except Exception as e:
+        log.warning("Request failed: %s", e)
+    finally:
+        writer.close()
+
+
+class MetricsServer:
+    def __init__(self):
+        self.server = None
+        self.probe = None
+
+    async def start(self, port, host=METRICS_HOST):
+        self.probe = asyncio.create_task(_loop_lag_probe())
+        if port:
+            self.server = await asyncio.start_server(_handle_http, host, port)
+            log.info("Serving on http://%s:%s/metrics", host, port)
+
+    async def stop(self):
+        if self.probe:
+            self.probe.cancel()
+            self.probe = None
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+
+METRICS_SERVER = MetricsServer()
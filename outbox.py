@@ -0,0 +1,270 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sqlite3
+import time
+import uuid
+
+from config import OUTBOX_PATH, OUTBOX_BATCH_SIZE, OUTBOX_MAX_ATTEMPTS
+from webhooks import WEBHOOKS
+
+log = logging.getLogger("outbox")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    endpoint TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    next_attempt_at REAL NOT NULL,
+    delivered_at REAL
+);
+CREATE INDEX IF NOT EXISTS entries_due ON entries (status, next_attempt_at);
+"""
+
+# How long a claimed batch is hidden from other drainers while it is delivered.
+LEASE_SECONDS = 60.0
+IDLE_POLL_SECONDS = 5.0
+# Card data collected by the order functions; never printed, and dropped from
+# disk together with the rest of the payload once n8n has accepted the entry.
+SENSITIVE_FIELDS = ("payment_method",)
+
+
+class Outbox:
+    """Append-only local log of order submissions.
+
+    Order functions write here and return immediately; a background drainer
+    delivers entries to n8n with at-least-once semantics. Every entry carries an
+    idempotency key (sent as the Idempotency-Key header) so redeliveries can be
+    deduplicated downstream. Payloads hold card details, so the database is
+    owner-only and a payload is wiped as soon as its entry is delivered.
+    """
+
+    def __init__(self, path=OUTBOX_PATH, batch_size=OUTBOX_BATCH_SIZE, max_attempts=OUTBOX_MAX_ATTEMPTS):
+        self.path = path
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.conn = None
+        self.wakeup = None
+        self.task = None
+
+    def connect(self):
+        if self.conn is None:
+            # SQLite creates the -wal/-shm files with the database's permissions.
+            os.close(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600))
+            os.chmod(self.path, 0o600)
+            self.conn = sqlite3.connect(self.path, isolation_level=None, timeout=5.0)
+            self.conn.row_factory = sqlite3.Row
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            # Overwrite freed pages so wiped payloads do not linger in the file.
+            self.conn.execute("PRAGMA secure_delete=ON")
+            self.conn.executescript(SCHEMA)
+            # Entries delivered before payloads were wiped on delivery.
+            self.conn.execute("UPDATE entries SET payload = 'null' WHERE status = 'delivered' AND payload != 'null'")
+        return self.conn
+
+    # ----- producer side -----
+    def add(self, endpoint, payload):
+        key = uuid.uuid4().hex
+        now = time.time()
+        self.connect().execute(
+            "INSERT INTO entries (idempotency_key, endpoint, payload, created_at, next_attempt_at)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (key, endpoint, json.dumps(payload), now, now),
+        )
+        if self.wakeup is not None:
+            self.wakeup.set()
+        return key
+
+    # ----- drainer -----
+    def claim_batch(self):
+        conn = self.connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                "SELECT * FROM entries WHERE status = 'pending' AND next_attempt_at <= ?"
+                " ORDER BY id LIMIT ?",
+                (now, self.batch_size),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE entries SET next_attempt_at = ? WHERE id = ?",
+                [(now + LEASE_SECONDS, row["id"]) for row in rows],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return rows
+
+    async def deliver(self, row):
+        try:
+            response = await WEBHOOKS.post(
+                row["endpoint"],
+                json.loads(row["payload"]),
+                headers={"Idempotency-Key": row["idempotency_key"]},
+            )
+            if 200 <= response.status_code < 300:
+                return None
+            return f"HTTP {response.status_code}: {response.text[:200]}"
+        except Exception as e:
+            return repr(e)
+
+    def record_results(self, rows, errors):
+        now = time.time()
+        delivered, failed = [], []
+        for row, error in zip(rows, errors):
+            if error is None:
+                delivered.append((now, row["id"]))
+                continue
+            attempts = row["attempts"] + 1
+            status = "failed" if attempts >= self.max_attempts else "pending"
+            retry_at = now + random.uniform(0, min(300.0, 2.0 ** attempts))
+            failed.append((status, attempts, error, retry_at, row["id"]))
+            log.warning("Delivery of %s #%s failed (%s), status=%s", row["endpoint"], row["id"], error, status)
+
+        conn = self.connect()
+        conn.execute("BEGIN")
+        conn.executemany(
+            "UPDATE entries SET status = 'delivered', delivered_at = ?, last_error = NULL, payload = 'null'"
+            " WHERE id = ?",
+            delivered,
+        )
+        conn.executemany(
+            "UPDATE entries SET status = ?, attempts = ?, last_error = ?, next_attempt_at = ? WHERE id = ?",
+            failed,
+        )
+        conn.execute("COMMIT")
+
+    async def drain_once(self):
+        rows = self.claim_batch()
+        if rows:
+            errors = await asyncio.gather(*(self.deliver(row) for row in rows))
+            self.record_results(rows, errors)
+        return len(rows)
+
+    async def _drain_forever(self):
+        while True:
+            try:
+                if await self.drain_once() == self.batch_size:
+                    continue
+            except Exception as e:
+                log.exception("Drainer error: %s", e)
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), IDLE_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        self.connect()
+        self.wakeup = asyncio.Event()
+        self.task = asyncio.create_task(self._drain_forever())
+
+    def stop(self):
+        if self.task:
+            self.task.cancel()
+            self.task = None
+
+    # ----- inspection -----
+    def list(self, status=None, limit=50):
+        query = "SELECT * FROM entries"
+        params = []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        return self.connect().execute(query, params).fetchall()
+
+    def replay(self, entry_ids=None, status="failed"):
+        """Make entries due again; by id, or every entry with `status`.
+
+        Delivered entries no longer have a payload and are never replayed.
+        """
+        if not entry_ids and status == "delivered":
+            return 0
+        conn = self.connect()
+        now = time.time()
+        if entry_ids:
+            cur = conn.executemany(
+                "UPDATE entries SET status = 'pending', attempts = 0, next_attempt_at = ?"
+                " WHERE id = ? AND status != 'delivered'",
+                [(now, entry_id) for entry_id in entry_ids],
+            )
+        else:
+            cur = conn.execute(
+                "UPDATE entries SET status = 'pending', attempts = 0, next_attempt_at = ? WHERE status = ?",
+                (now, status),
+            )
+        return cur.rowcount
+
+
+OUTBOX = Outbox()
+
+
+def redact(payload):
+    """`payload` with SENSITIVE_FIELDS masked, for display."""
+    if not isinstance(payload, dict):
+        return payload
+    return {key: "[redacted]" if key in SENSITIVE_FIELDS and value else value for key, value in payload.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and replay queued n8n order submissions.")
+    parser.add_argument("--path", default=OUTBOX_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    list_cmd = sub.add_parser("list", help="List outbox entries")
+    list_cmd.add_argument("--status", choices=["pending", "failed", "delivered"])
+    list_cmd.add_argument("--limit", type=int, default=50)
+
+    show_cmd = sub.add_parser("show", help="Print one entry with its payload")
+    show_cmd.add_argument("id", type=int)
+
+    replay_cmd = sub.add_parser("replay", help="Reset entries to pending (default: all failed)")
+    replay_cmd.add_argument("ids", type=int, nargs="*")
+
+    sub.add_parser("drain", help="Deliver everything currently due, then exit")
+
+    args = parser.parse_args()
+    outbox = Outbox(args.path)
+
+    if args.command == "list":
+        for row in outbox.list(args.status, args.limit):
+            created = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row["created_at"]))
+            print(f"{row['id']:>6}  {row['status']:<9} {row['attempts']:>2}  {created}  "
+                  f"{row['endpoint']:<24} {row['last_error'] or ''}")
+    elif args.command == "show":
+        row = outbox.connect().execute("SELECT * FROM entries WHERE id = ?", (args.id,)).fetchone()
+        if row is None:
+            print(f"No entry {args.id}")
+            return
+        entry = dict(row)
+        entry["payload"] = redact(json.loads(entry["payload"]))
+        print(json.dumps(entry, indent=2))
+    elif args.command == "replay":
+        print(f"Replayed {outbox.replay(args.ids)} entries")
+    elif args.command == "drain":
+        async def drain():
+            total = 0
+            while True:
+                count = await outbox.drain_once()
+                total += count
+                if count < outbox.batch_size:
+                    break
+            await WEBHOOKS.aclose()
+            print(f"Attempted {total} entries")
+        asyncio.run(drain())
+
+
+if __name__ == "__main__":
+    main()
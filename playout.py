@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+from audio_assets import FRAME_BYTES
+from twilio_codec import clear_message, mark_message, media_message, media_suffix
+from config import PLAYOUT_LEAD_MS
+
+log = logging.getLogger("playout")
+
+FRAME_SECONDS = FRAME_BYTES / 8000.0
+
+
+class Mark:
+    """A Twilio mark queued in-line with the frames it follows."""
+
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+
+class PlayoutScheduler:
+    """Per-call outbound audio pacer.
+
+    Audio is sliced into 20 ms frames and released on a monotonic clock so that
+    Twilio never holds more than `lead` seconds of not-yet-played audio. A
+    barge-in therefore only has to discard what is still queued here plus at
+    most the lead, instead of seconds of burst-sent audio.
+    """
+
+    def __init__(self, twilio_ws, lead=PLAYOUT_LEAD_MS / 1000.0):
+        self.twilio_ws = twilio_ws
+        self.lead = lead
+        self.frames = deque()
+        self.remainder = b""
+        self.wakeup = asyncio.Event()
+        self.task = None
+        # Current contiguous run of playback at Twilio.
+        self.run_start = None
+        self.run_frames = 0
+        # Frames that have finished playing in earlier runs.
+        self.played_frames_total = 0
+        # One-shot callbacks fired when the next media frame goes out.
+        self.on_next_send = []
+
+    # ----- enqueue -----
+    def enqueue_audio(self, audio):
+        """Queue raw ulaw_8000 bytes; a trailing partial frame waits for flush()."""
+        data = self.remainder + audio if self.remainder else audio
+        usable = len(data) - len(data) % FRAME_BYTES
+        for i in range(0, usable, FRAME_BYTES):
+            self.frames.append(media_suffix(data[i:i + FRAME_BYTES]))
+        self.remainder = data[usable:]
+        self._wake()
+
+    def enqueue_frames(self, suffixes):
+        """Queue frames already serialized by audio_assets."""
+        self.flush()
+        self.frames.extend(suffixes)
+        self._wake()
+
+    def enqueue_mark(self, name):
+        """Queue a Twilio mark; Twilio echoes it once every earlier frame has played."""
+        self.flush()
+        self.frames.append(Mark(name))
+        self._wake()
+
+    def notify_next_send(self, callback):
+        """Call `callback()` once, right after the next media frame is sent."""
+        self.on_next_send.append(callback)
+
+    def flush(self):
+        if self.remainder:
+            self.frames.append(media_suffix(self.remainder))
+            self.remainder = b""
+            self._wake()
+
+    async def clear(self):
+        """Drop everything not yet played, here and in Twilio's buffer.
+
+        Returns the names of marks that were dropped before being sent; marks
+        already sent are echoed back by Twilio in response to the clear.
+        """
+        dropped_marks = [item.name for item in self.frames if isinstance(item, Mark)]
+        self.frames.clear()
+        self.remainder = b""
+        self._end_run(time.monotonic())
+        try:
+            await self.twilio_ws.send(clear_message(getattr(self.twilio_ws, "streamsid", None)))
+        except Exception as e:
+            log.warning("Error sending clear: %s", e)
+        return dropped_marks
+
+    # ----- accounting -----
+    def _played_in_run(self, now):
+        if self.run_start is None:
+            return 0
+        return min(self.run_frames, int((now - self.run_start) / FRAME_SECONDS))
+
+    def _end_run(self, now):
+        self.played_frames_total += self._played_in_run(now)
+        self.run_start = None
+        self.run_frames = 0
+
+    @property
+    def queued_ms(self):
+        """Audio waiting here that has not been sent to Twilio yet."""
+        frames = sum(1 for item in self.frames if not isinstance(item, Mark))
+        return (frames * FRAME_BYTES + len(self.remainder)) / 8.0
+
+    @property
+    def buffered_ms(self):
+        """Audio already sent to Twilio but not yet played out."""
+        now = time.monotonic()
+        return (self.run_frames - self._played_in_run(now)) * FRAME_SECONDS * 1000.0
+
+    @property
+    def played_ms(self):
+        """Total audio played to the caller on this call."""
+        now = time.monotonic()
+        return (self.played_frames_total + self._played_in_run(now)) * FRAME_SECONDS * 1000.0
+
+    @property
+    def pending_seconds(self):
+        return (self.queued_ms + self.buffered_ms) / 1000.0
+
+    # ----- pacing loop -----
+    def _wake(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+        self.wakeup.set()
+
+    async def _run(self):
+        while True:
+            if not self.frames:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+
+            stream_sid = getattr(self.twilio_ws, "streamsid", None)
+            if isinstance(self.frames[0], Mark):
+                mark = self.frames.popleft()
+                await self._send(mark_message(stream_sid, mark.name))
+                continue
+
+            now = time.monotonic()
+            if self.run_start is None or now >= self.run_start + self.run_frames * FRAME_SECONDS:
+                # Twilio's buffer ran dry: playback restarts from this frame.
+                self._end_run(now)
+                self.run_start = now
+
+            due = self.run_start + self.run_frames * FRAME_SECONDS - self.lead
+            if due > now:
+                await asyncio.sleep(due - now)
+                continue
+
+            suffix = self.frames.popleft()
+            self.run_frames += 1
+            await self._send(media_message(stream_sid, suffix))
+            if self.on_next_send:
+                callbacks, self.on_next_send = self.on_next_send, []
+                for callback in callbacks:
+                    callback()
+
+    async def _send(self, message):
+        try:
+            await self.twilio_ws.send(message)
+        except Exception as e:
+            log.warning("Error sending frame: %s", e)
+            self.frames.clear()
+            self.remainder = b""
+
+    def close(self):
+        if self.task:
+            self.task.cancel()
+            self.task = None
@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import random
+import time
+
+from config import RECORDING_WORKERS, RECORDING_MAX_WAIT
+from timer_wheel import TIMERS
+from twilio_utils import get_recording_status, download_twilio_recording, delete_twilio_recording
+
+log = logging.getLogger("recordings")
+
+READY_STATUSES = {"completed"}
+FAILED_STATUSES = {"absent", "failed", "deleted"}
+
+
+class RecordingJobQueue:
+    """Downloads and deletes call recordings off the call path.
+
+    Teardown only enqueues the recording SID; workers check its status with
+    Twilio and, while it is still processing, park the job on the shared timer
+    wheel with exponential backoff instead of sleeping, so one slow recording
+    does not hold a worker. Completed recordings are streamed to disk and the
+    remote copy is deleted.
+    """
+
+    def __init__(self, workers=RECORDING_WORKERS, max_wait=RECORDING_MAX_WAIT):
+        self.workers = workers
+        self.max_wait = max_wait
+        self.queue = asyncio.Queue()
+        self.tasks = []
+        self.waiting = set()
+
+    def enqueue(self, recording_sid):
+        self.queue.put_nowait((recording_sid, time.monotonic() + self.max_wait, 1.0))
+        log.info("Queued %s", recording_sid)
+
+    async def check_ready(self, recording_sid, deadline, delay):
+        """True when ready, False to give up, None after re-queueing for a later check."""
+        try:
+            status = await get_recording_status(recording_sid)
+        except Exception as e:
+            status = None
+            log.warning("Status check for %s failed: %s", recording_sid, e)
+        if status in READY_STATUSES:
+            return True
+        if status in FAILED_STATUSES:
+            log.error("%s is %s, giving up", recording_sid, status)
+            return False
+        if time.monotonic() + delay > deadline:
+            log.error("%s not ready after %.0fs, giving up", recording_sid, self.max_wait)
+            return False
+        job = (recording_sid, deadline, min(delay * 2, 30.0))
+        self.waiting.add(TIMERS.call_later(delay + random.uniform(0, delay / 2), self._requeue, job))
+        return None
+
+    def _requeue(self, job):
+        self.waiting = {timer for timer in self.waiting if timer.active}
+        self.queue.put_nowait(job)
+
+    async def process(self, job):
+        recording_sid = job[0]
+        if not await self.check_ready(*job):
+            return
+        await download_twilio_recording(recording_sid)
+        await delete_twilio_recording(recording_sid)
+
+    async def _worker(self):
+        while True:
+            job = await self.queue.get()
+            try:
+                await self.process(job)
+            except Exception as e:
+                log.exception("Failed to process %s: %s", job[0], e)
+            finally:
+                self.queue.task_done()
+
+    def start(self):
+        self.tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        self.tasks = []
+        for timer in self.waiting:
+            timer.cancel()
+        self.waiting.clear()
+
+
+RECORDINGS = RecordingJobQueue()
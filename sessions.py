@@ -1,47 +1,214 @@
 import asyncio
-from audio_streaming import stream_ulaw_audio
-from twilio_utils import download_twilio_recording, delete_twilio_recording
-from config import SILENCE_TIMEOUT
+import logging
+from audio_streaming import stream_asset
+from recordings import RECORDINGS
+from twilio_utils import start_twilio_recording
+from config import SILENCE_TIMEOUT, FINAL_TIMEOUT, HANGUP_DELAY, SPEECH_DRAIN_TIMEOUT, BARGE_IN_MODE, BARGE_IN_MIN_SPEECH_MS, STT_SILENCE_SUPPRESSION
+from playout import PlayoutScheduler
+from audio_queue import InboundAudioQueue
+from metrics import TurnTimer
+from agent_audio import AgentAudioBuffer
+from vad import VoiceActivityDetector
+from silence_gate import SilenceGate
+from timer_wheel import TIMERS
+from elevenlabs_utils import stream_agent_text
+
+log = logging.getLogger("sessions")
 
 class CallSession:
     def __init__(self, twilio_ws, sts_ws):
         self.twilio_ws = twilio_ws
         self.sts_ws = sts_ws
         self.finish_call_sent = False
-        self.silence_task = None
-        self.final_task = None        
+        self.silence_timer = None
+        self.silence_arming = None
+        self.final_timer = None
+        self.hangup_timer = None
         self.call_sid = None
         self.recording_sid = None
+        self.recording_task = None
+        self.recording_finished = False
         self.bot_speaking = None
-        self.bot_speaking_count = 0
+        self.pending_marks = set()
+        self.mark_counter = 0
         self.interupt_word = ""
         self.ignore = False
+        self.playout = PlayoutScheduler(twilio_ws)
+        self.audio_queue = InboundAudioQueue(on_overflow=self._on_audio_overflow)
+        self.turns = TurnTimer()
+        self.agent_audio = AgentAudioBuffer()
+        self.utterance_task = None
+        self.speech_tasks = set()
+        self.vad = VoiceActivityDetector() if BARGE_IN_MODE == "vad" else None
+        self.vad_barged_in = False
+        self.barge_in_from_ms = 0
+        self.silence_gate = SilenceGate() if STT_SILENCE_SUPPRESSION else None
+
+    async def close(self):
+        for ws in (self.twilio_ws, self.sts_ws):
+            try:
+                await ws.close()
+            except Exception:
+                pass
+
+    def _on_audio_overflow(self):
+        asyncio.create_task(self.close())
+
+    def caller_barged_in(self, energy_db, zcr):
+        """Run the VAD on inbound frame features; True once per speech run that should interrupt.
+
+        That is when the caller has spoken for BARGE_IN_MIN_SPEECH_MS while the
+        bot is talking; shorter sounds ("uh-huh", a cough) let the bot go on.
+        """
+        event = self.vad.update(energy_db, zcr)
+        if event == "start":
+            self.vad_barged_in = False
+            self.barge_in_from_ms = 0
+            log.debug("Caller speech started (local VAD)")
+        speech_ms = self.vad.speech_ms - self.barge_in_from_ms
+        if self.bot_speaking and not self.vad_barged_in and speech_ms >= BARGE_IN_MIN_SPEECH_MS:
+            self.vad_barged_in = True
+            log.info("Caller barged in after %d ms of speech", speech_ms)
+            return True
+        return False
+
+    def begin_utterance(self):
+        """Register an utterance; bot_speaking holds until Twilio echoes its mark."""
+        self.mark_counter += 1
+        name = f"utterance-{self.mark_counter}"
+        self.pending_marks.add(name)
+        self.bot_speaking = True
+        if self.vad is not None:
+            # Each utterance can be interrupted afresh; speech already under way
+            # only counts from the moment the bot starts talking over it.
+            self.vad_barged_in = False
+            self.barge_in_from_ms = self.vad.speech_ms
+        return name
+
+    def speak(self, text):
+        """Voice `text` in the background, after any utterance still being synthesized.
+
+        The STS receiver keeps reading (function calls, barge-in events, agent
+        audio for hedging) while ElevenLabs renders.
+        """
+        previous = self.utterance_task
+        # Bind the agent audio of the turn this text belongs to now; by the time
+        # the previous utterance is done, the buffer may have moved on.
+        agent_turn = self.agent_audio.current
+        self.utterance_task = asyncio.create_task(self._speak(text, previous, agent_turn))
+        self.speech_tasks.add(self.utterance_task)
+        self.utterance_task.add_done_callback(self.speech_tasks.discard)
+
+    def cancel_speech(self):
+        """Abort every utterance being synthesized or waiting its turn.
+
+        Cancellation closes the upstream TTS streams; nothing is enqueued for
+        playout after this returns.
+        """
+        for task in self.speech_tasks:
+            task.cancel()
+        self.utterance_task = None
+
+    async def _speak(self, text, previous, agent_turn):
+        if previous is not None:
+            await asyncio.wait({previous})
+        await stream_agent_text(text, self, agent_turn)
+
+    async def wait_until_played(self, timeout=SPEECH_DRAIN_TIMEOUT):
+        """Wait for queued utterances to be synthesized and played; False on timeout."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        # utterance_task moves on as chained utterances start, so re-read it.
+        while self.utterance_task is not None and not self.utterance_task.done():
+            if deadline <= loop.time():
+                return False
+            await asyncio.wait({self.utterance_task}, timeout=deadline - loop.time())
+        while (pending := self.playout.pending_seconds) > 0:
+            if deadline <= loop.time():
+                return False
+            await asyncio.sleep(min(pending, deadline - loop.time()))
+        return True
+
+    def end_utterance(self, name):
+        """Tag the end of the utterance's audio in the playout queue."""
+        self.playout.enqueue_mark(name)
+
+    def mark_played(self, name):
+        self.pending_marks.discard(name)
+        self.bot_speaking = bool(self.pending_marks)
+
+    async def clear_playout(self):
+        self.cancel_speech()
+        for name in await self.playout.clear():
+            self.mark_played(name)
+
+    def start_recording(self):
+        """Start the Twilio recording concurrently with media forwarding."""
+        if self.call_sid and self.recording_task is None:
+            self.recording_task = asyncio.create_task(self._start_recording())
+
+    async def _start_recording(self):
+        try:
+            recording_sid = await start_twilio_recording(self.call_sid)
+        except Exception as e:
+            log.error("Recording failed to start: %s", e)
+            return
+        if not recording_sid:
+            return
+        self.recording_sid = recording_sid
+        log.info("Recording started, SID: %s", recording_sid)
+        if self.recording_finished:
+            # The call ended while the request was in flight.
+            self.finish_recording()
+
+    def finish_recording(self):
+        """Hand the call recording to the post-processing workers (once)."""
+        self.recording_finished = True
+        if self.recording_sid:
+            RECORDINGS.enqueue(self.recording_sid)
+            self.recording_sid = None
 
     async def nudge(self):
-        print("[Silence Watchdog] User inactive. Sending nudge audio.")
-        await stream_ulaw_audio("deepgram_tts/check_activity.ulaw", self)
-        await asyncio.sleep(10.0)
-        self.final_task = asyncio.create_task(self.final_hangup())
+        log.info("User inactive, sending nudge audio")
+        await stream_asset("check_activity", self)
+        self.final_timer = TIMERS.call_later(FINAL_TIMEOUT, self.final_hangup)
 
     async def final_hangup(self):
-        print("[Final Hangup] Playing final audio and closing call.")
-        await stream_ulaw_audio("deepgram_tts/finish_call.ulaw", self)
-        await asyncio.sleep(6.0)
+        log.info("Playing final audio and closing call")
+        await stream_asset("finish_call", self)
+        self.hangup_timer = TIMERS.call_later(HANGUP_DELAY, self._hang_up)
+
+    async def _hang_up(self):
         await self.twilio_ws.close()
         await self.sts_ws.close()
-        print("[Final Hangup] Twilio socket closed, call ended.")
-        if self.recording_sid:
-            print("2. recording_sid is here", self.recording_sid)
-            await asyncio.sleep(6.0)
-            download_twilio_recording(self.recording_sid)
-            delete_twilio_recording(self.recording_sid)
-
-    async def start_silence_timer(self):
-        if self.silence_task:
-            self.silence_task.cancel()
-        self.silence_task = asyncio.create_task(self._silence_watchdog())
-        print("[Silence Timer] Started/Reset.")
-
-    async def _silence_watchdog(self):
-        await asyncio.sleep(SILENCE_TIMEOUT)
-        await self.nudge()
+        log.info("Twilio socket closed, call ended")
+        self.finish_recording()
+
+    def start_silence_timer(self):
+        """(Re-)arm the inactivity watchdog once the bot's current speech has played."""
+        if self.silence_arming is not None:
+            self.silence_arming.cancel()
+        self.silence_arming = asyncio.create_task(self._arm_silence_timer())
+
+    async def _arm_silence_timer(self):
+        await self.wait_until_played()
+        self.silence_arming = None
+        if self.silence_timer is None:
+            self.silence_timer = TIMERS.call_later(SILENCE_TIMEOUT, self.nudge)
+        else:
+            self.silence_timer.reset(SILENCE_TIMEOUT)
+        log.debug("Silence timer started/reset")
+
+    def cancel_silence_timer(self):
+        """The caller is active: stop the watchdog and a pending post-nudge hangup."""
+        if self.silence_arming is not None:
+            self.silence_arming.cancel()
+            self.silence_arming = None
+        for timer in (self.silence_timer, self.final_timer):
+            if timer is not None:
+                timer.cancel()
+
+    def cancel_timers(self):
+        self.cancel_silence_timer()
+        if self.hangup_timer is not None:
+            self.hangup_timer.cancel()
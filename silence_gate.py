@@ -0,0 +1,86 @@
+import logging
+from collections import deque
+
+from config import STT_SILENCE_DB, STT_SILENCE_HOLD_MS, STT_SILENCE_PREROLL_MS, STT_SILENCE_SPARSE_MS
+
+log = logging.getLogger("silence_gate")
+
+FRAME_MS = 20
+
+# Process-wide totals across calls (read by the metrics gauges).
+SILENCE_STATS = {"withheld_bytes": 0, "withheld_frames": 0}
+
+
+class SilenceGate:
+    """Per-call filter that keeps long stretches of caller silence away from STT.
+
+    Audio is forwarded as usual until the line has been silent (every frame
+    below `threshold_db`) for `hold_ms`, which leaves Deepgram enough trailing
+    silence to end the utterance. From then on only one frame every
+    `sparse_ms` goes out so the stream stays alive; the others are parked in
+    a `preroll_ms` ring buffer. The first loud frame releases that buffer ahead
+    of itself, so a speech onset is never clipped.
+    """
+
+    def __init__(self, threshold_db=STT_SILENCE_DB, hold_ms=STT_SILENCE_HOLD_MS,
+                 preroll_ms=STT_SILENCE_PREROLL_MS, sparse_ms=STT_SILENCE_SPARSE_MS):
+        self.threshold_db = threshold_db
+        self.hold_frames = max(1, hold_ms // FRAME_MS)
+        self.sparse_frames = max(1, sparse_ms // FRAME_MS)
+        self.preroll = deque(maxlen=max(1, preroll_ms // FRAME_MS))
+        self.silent_frames = 0
+        self.since_sparse = 0
+        self.withheld_bytes = 0
+        self.withheld_frames = 0
+        self.suppressed_runs = 0
+
+    @property
+    def suppressing(self):
+        return self.silent_frames >= self.hold_frames
+
+    def admit(self, audio, energy_db):
+        """Return the audio to forward for this chunk (b"" to send nothing).
+
+        `energy_db` holds the per-frame levels of `audio` from
+        vad.frame_features().
+        """
+        if any(level >= self.threshold_db for level in energy_db):
+            if self.suppressing and self.preroll:
+                audio = b"".join(self.preroll) + audio
+                self.preroll.clear()
+            self.silent_frames = 0
+            return audio
+
+        was_suppressing = self.suppressing
+        self.silent_frames += len(energy_db) or 1
+        if not self.suppressing:
+            return audio
+        if not was_suppressing:
+            self.suppressed_runs += 1
+            self.since_sparse = 0
+        self.since_sparse += 1
+        if self.since_sparse >= self.sparse_frames:
+            self.since_sparse = 0
+            return audio
+
+        if len(self.preroll) == self.preroll.maxlen:
+            self._withhold(self.preroll[0])
+        self.preroll.append(audio)
+        return b""
+
+    def _withhold(self, audio):
+        self.withheld_bytes += len(audio)
+        self.withheld_frames += 1
+        SILENCE_STATS["withheld_bytes"] += len(audio)
+        SILENCE_STATS["withheld_frames"] += 1
+
+    def stats(self, frames_per_send=1):
+        """Savings so far; `frames_per_send` converts withheld frames to saved sends."""
+        withheld_bytes = self.withheld_bytes + sum(len(frame) for frame in self.preroll)
+        withheld_frames = self.withheld_frames + len(self.preroll)
+        return {
+            "withheld_bytes": withheld_bytes,
+            "withheld_frames": withheld_frames,
+            "saved_sends": withheld_frames // max(1, frames_per_send),
+            "suppressed_runs": self.suppressed_runs,
+        }
@@ -0,0 +1,191 @@
+import asyncio
+import multiprocessing
+import os
+import signal
+import time
+
+from config import WORKER_HEALTH_TIMEOUT, METRICS_PORT
+
+STATUS_INTERVAL = 60.0
+STARTUP_GRACE = 15.0
+
+# Each worker owns one slot of the shared stats array:
+# pid, heartbeat, active calls, draining flag.
+SLOT_FIELDS = 4
+
+_ctx = multiprocessing.get_context("fork")
+
+
+def _run_worker(stats, slot):
+    # The supervisor owns Ctrl-C; workers only react to SIGTERM (drain and exit).
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_DFL)
+    signal.signal(signal.SIGUSR1, signal.SIG_DFL)
+    import app
+
+    base = slot * SLOT_FIELDS
+
+    def report(active_calls, draining=False):
+        stats[base] = os.getpid()
+        stats[base + 1] = time.time()
+        stats[base + 2] = active_calls
+        stats[base + 3] = 1.0 if draining else 0.0
+
+    metrics_port = METRICS_PORT + 1 + slot if METRICS_PORT else 0
+    asyncio.run(app.serve(reuse_port=True, report=report, metrics_port=metrics_port))
+
+
+class Worker:
+    def __init__(self, index, slot, process):
+        self.index = index
+        self.slot = slot
+        self.process = process
+        self.started = time.time()
+        self.draining = False
+
+
+class Supervisor:
+    """Forks N workers that all bind the server port with SO_REUSEPORT.
+
+    Signals: SIGHUP rolls every worker (new one up before the old one drains),
+    SIGUSR1 prints the aggregated status, SIGTERM/SIGINT drain and stop. A
+    single worker can be restarted gracefully by sending it SIGTERM; it stops
+    accepting, finishes its calls and is replaced.
+    """
+
+    def __init__(self, workers):
+        self.size = workers
+        # Spare slots so replacements can run next to draining workers.
+        self.stats = _ctx.Array("d", 4 * workers * SLOT_FIELDS, lock=False)
+        self.free_slots = list(range(4 * workers))
+        self.workers = {}
+        self.draining = []
+        self.stopping = False
+        self.restart_requested = False
+        self.status_requested = False
+
+    # ----- process management -----
+    def spawn(self, index):
+        if not self.free_slots:
+            print(f"[Supervisor] No free slot for worker {index}, waiting for draining workers")
+            return None
+        slot = self.free_slots.pop(0)
+        base = slot * SLOT_FIELDS
+        self.stats[base:base + SLOT_FIELDS] = [0.0] * SLOT_FIELDS
+        process = _ctx.Process(target=_run_worker, args=(self.stats, slot), daemon=False)
+        process.start()
+        worker = Worker(index, slot, process)
+        self.workers[index] = worker
+        print(f"[Supervisor] Worker {index} started (pid {process.pid})")
+        return worker
+
+    def drain(self, worker, signal_worker=True):
+        worker.draining = True
+        self.draining.append(worker)
+        if signal_worker and worker.process.is_alive():
+            os.kill(worker.process.pid, signal.SIGTERM)
+
+    def heartbeat_age(self, worker):
+        last = self.stats[worker.slot * SLOT_FIELDS + 1]
+        return time.time() - (last or worker.started)
+
+    def active_calls(self, worker):
+        return int(self.stats[worker.slot * SLOT_FIELDS + 2])
+
+    def reap(self):
+        for worker in list(self.draining):
+            if not worker.process.is_alive():
+                worker.process.join()
+                self.draining.remove(worker)
+                self.free_slots.append(worker.slot)
+                print(f"[Supervisor] Worker pid {worker.process.pid} drained and exited")
+
+        for index, worker in list(self.workers.items()):
+            if worker.process.is_alive() and self.stats[worker.slot * SLOT_FIELDS + 3]:
+                # Sent SIGTERM from outside: replace it while it finishes its calls.
+                print(f"[Supervisor] Worker {index} (pid {worker.process.pid}) is draining, replacing")
+                del self.workers[index]
+                self.drain(worker, signal_worker=False)
+                continue
+            if worker.process.is_alive():
+                age = self.heartbeat_age(worker)
+                if age > WORKER_HEALTH_TIMEOUT and time.time() - worker.started > STARTUP_GRACE:
+                    print(f"[Supervisor] Worker {index} (pid {worker.process.pid}) unresponsive "
+                          f"for {age:.1f}s, killing")
+                    worker.process.kill()
+                continue
+            worker.process.join()
+            self.free_slots.append(worker.slot)
+            del self.workers[index]
+            if not self.stopping:
+                print(f"[Supervisor] Worker {index} (pid {worker.process.pid}) exited with "
+                      f"{worker.process.exitcode}, respawning")
+
+        if not self.stopping:
+            for index in range(self.size):
+                if index not in self.workers:
+                    self.spawn(index)
+
+    def rolling_restart(self):
+        print("[Supervisor] Rolling restart")
+        for index in range(self.size):
+            old = self.workers.get(index)
+            new = self.spawn(index)
+            if new is None:
+                break
+            deadline = time.time() + STARTUP_GRACE
+            while not self.stats[new.slot * SLOT_FIELDS + 1] and time.time() < deadline:
+                time.sleep(0.1)
+            if old is not None:
+                self.drain(old)
+
+    def status(self):
+        lines = []
+        total = 0
+        for worker in sorted(self.workers.values(), key=lambda w: w.index) + self.draining:
+            calls = self.active_calls(worker)
+            total += calls
+            state = "draining" if worker.draining else "serving"
+            lines.append(f"  worker {worker.index} pid={worker.process.pid} {state} "
+                         f"calls={calls} heartbeat={self.heartbeat_age(worker):.1f}s ago")
+        print(f"[Supervisor] {len(self.workers)} workers, {len(self.draining)} draining, "
+              f"{total} active calls\n" + "\n".join(lines))
+
+    # ----- main loop -----
+    def _on_stop(self, signum, frame):
+        self.stopping = True
+
+    def _on_hup(self, signum, frame):
+        self.restart_requested = True
+
+    def _on_usr1(self, signum, frame):
+        self.status_requested = True
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGHUP, self._on_hup)
+        signal.signal(signal.SIGUSR1, self._on_usr1)
+
+        for index in range(self.size):
+            self.spawn(index)
+
+        last_status = time.time()
+        while not self.stopping:
+            time.sleep(1.0)
+            if self.restart_requested:
+                self.restart_requested = False
+                self.rolling_restart()
+            self.reap()
+            if self.status_requested or time.time() - last_status > STATUS_INTERVAL:
+                self.status_requested = False
+                last_status = time.time()
+                self.status()
+
+        print("[Supervisor] Stopping workers...")
+        for worker in list(self.workers.values()):
+            self.drain(worker)
+        self.workers.clear()
+        for worker in self.draining:
+            worker.process.join()
+        print("[Supervisor] All workers stopped.")
@@ -0,0 +1,70 @@
+"""In-process stand-ins for the Twilio and Deepgram agent sockets."""
+import asyncio
+import base64
+import json
+
+STREAM_SID = "MZ00000000000000000000000000000000"
+# mu-law silence: quiet enough that the VAD never calls it a barge-in.
+QUIET_FRAME = b"\xff" * 160
+
+
+def media_event(sequence, audio=QUIET_FRAME):
+    return json.dumps({
+        "event": "media",
+        "sequenceNumber": str(sequence),
+        "media": {
+            "track": "inbound",
+            "chunk": str(sequence),
+            "timestamp": str(sequence * 20),
+            "payload": base64.b64encode(audio).decode("ascii"),
+        },
+        "streamSid": STREAM_SID,
+    })
+
+
+class FakeTwilioSocket:
+    """Records what the call sends; optionally plays caller frames in real time.
+
+    With `frames`, iterating yields one inbound media event every 20 ms on a
+    fixed schedule and notes when each was due in `due`, so a late read shows
+    up as latency instead of shifting the schedule.
+    """
+
+    def __init__(self, frames=0):
+        self.streamsid = STREAM_SID
+        self.frames = frames
+        self.due = []
+        self.sent = []
+        self.closed_at = None
+
+    async def __aiter__(self):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for sequence in range(self.frames):
+            due = start + sequence * 0.02
+            await asyncio.sleep(max(0.0, due - loop.time()))
+            self.due.append(due)
+            yield media_event(sequence)
+
+    async def send(self, message):
+        self.sent.append((asyncio.get_running_loop().time(), message))
+
+    async def close(self):
+        if self.closed_at is None:
+            self.closed_at = asyncio.get_running_loop().time()
+
+    def media_sent(self, after=float("-inf")):
+        return [message for at, message in self.sent if at > after and '"event":"media"' in message]
+
+
+class FakeAgentSocket(FakeTwilioSocket):
+    """Deepgram agent socket that delivers `messages` (dicts) and then stays open."""
+
+    def __init__(self, messages=()):
+        super().__init__()
+        self.messages = messages
+
+    async def __aiter__(self):
+        for message in self.messages:
+            yield json.dumps(message)
+        await asyncio.Event().wait()
@@ -0,0 +1,93 @@
+import asyncio
+import json
+import socket
+
+import agent_pool
+from agent_pool import AgentPool
+from loadtest.fakes import FakeAgentServer
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def next_type(messages, wanted=None):
+    """Type of the next text message (skipping binary audio), or of the next `wanted` one."""
+    while True:
+        # Read directly, without yielding to the loop first, as sts_receiver does.
+        message = await anext(messages)
+        if isinstance(message, str):
+            mtype = json.loads(message)["type"]
+            if wanted is None or mtype == wanted:
+                return mtype
+
+
+async def wait_for(predicate, timeout=5.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not predicate():
+        assert loop.time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def run_with_agent_server(monkeypatch, test):
+    port = free_port()
+    monkeypatch.setattr(agent_pool, "DEEPGRAM_WS_URL", f"ws://127.0.0.1:{port}")
+    # Keep the parked reader busy with recv()/KeepAlive while the call claims it.
+    monkeypatch.setattr(agent_pool, "AGENT_KEEPALIVE_INTERVAL", 0.05)
+
+    async def main():
+        # One user turn per 100 ms of caller audio.
+        server = FakeAgentServer(port, turn_seconds=0.1, agent_audio=False)
+        await server.start()
+        try:
+            await asyncio.wait_for(test(), 10.0)
+        finally:
+            await server.stop()
+
+    asyncio.run(main())
+
+
+def test_claimed_session_replays_buffer_then_reads_live(monkeypatch):
+    async def test():
+        pool = AgentPool(min_size=1, max_size=1)
+        pool.start()
+        try:
+            await wait_for(lambda: pool.idle and len(pool.idle[0].buffered) >= 3)
+            await asyncio.sleep(0.2)
+
+            conn = await pool.acquire()
+            try:
+                assert pool.stats()["hits"] == 1
+                messages = aiter(conn)
+                # Everything the agent sent while the session was parked, in order.
+                assert await next_type(messages) == "Welcome"
+                assert await next_type(messages) == "SettingsApplied"
+                assert await next_type(messages) == "ConversationText"
+                # Then the live socket, with no recv() left over from the parked reader.
+                await conn.send(b"\xff" * 1600)
+                assert await next_type(messages, "UserStartedSpeaking") == "UserStartedSpeaking"
+            finally:
+                await conn.close()
+
+            # The pool refills itself after a claim.
+            await wait_for(lambda: len(pool.idle) == 1)
+        finally:
+            await pool.stop()
+
+    run_with_agent_server(monkeypatch, test)
+
+
+def test_acquire_connects_directly_when_pool_is_empty(monkeypatch):
+    async def test():
+        pool = AgentPool(min_size=1, max_size=1)
+        conn = await pool.acquire()
+        try:
+            assert pool.stats()["misses"] == 1
+            assert await next_type(aiter(conn)) == "Welcome"
+        finally:
+            await conn.close()
+
+    run_with_agent_server(monkeypatch, test)
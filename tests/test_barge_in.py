@@ -0,0 +1,54 @@
+import asyncio
+
+import elevenlabs_utils
+from sessions import CallSession
+from tts_cache import PhraseCache
+
+from fakes import FakeTwilioSocket
+
+
+class EndlessTTS:
+    """Fake ElevenLabs stream that keeps producing audio until it is closed."""
+
+    def __init__(self):
+        self.text_to_speech = self
+        self.opened = 0
+        self.closed = 0
+
+    async def stream(self, **kwargs):
+        self.opened += 1
+        try:
+            while True:
+                await asyncio.sleep(0.02)
+                yield b"\xff" * 800
+        finally:
+            self.closed += 1
+
+
+def test_no_frames_are_sent_after_clear_playout(monkeypatch):
+    tts = EndlessTTS()
+    monkeypatch.setattr(elevenlabs_utils, "elevenlabs", tts)
+    monkeypatch.setattr(elevenlabs_utils, "phrase_cache", PhraseCache(1024 * 1024))
+
+    async def main():
+        twilio_ws = FakeTwilioSocket()
+        session = CallSession(twilio_ws, FakeTwilioSocket())
+        session.speak("This is a long first sentence that keeps going for a while. And a second one follows it.")
+        session.speak("A queued follow-up utterance that should never play.")
+        await asyncio.sleep(0.5)
+        assert twilio_ws.media_sent(), "the bot should be talking before the barge-in"
+
+        cancelled_at = asyncio.get_running_loop().time()
+        await session.clear_playout()
+        await asyncio.sleep(1.0)
+        try:
+            return session, twilio_ws.media_sent(after=cancelled_at)
+        finally:
+            session.playout.close()
+
+    session, sent_after = asyncio.run(main())
+
+    assert sent_after == []
+    assert tts.opened > 0 and tts.closed == tts.opened, "every upstream stream should be closed"
+    assert not session.speech_tasks
+    assert not session.bot_speaking and not session.pending_marks
@@ -0,0 +1,71 @@
+import asyncio
+
+import elevenlabs_utils
+import handlers
+from sessions import CallSession
+from tts_cache import PhraseCache
+
+from fakes import FakeAgentSocket, FakeTwilioSocket
+
+SPEECH_FRAMES = 200  # four seconds, longer than the old fixed 3 s wait
+
+
+class QuickTTS:
+    """Renders SPEECH_FRAMES of audio in ~0.3 s, so playout lags synthesis."""
+
+    def __init__(self):
+        self.text_to_speech = self
+
+    async def stream(self, **kwargs):
+        await asyncio.sleep(0.2)
+        for _ in range(10):
+            yield b"\xff" * (SPEECH_FRAMES * 16)
+            await asyncio.sleep(0.01)
+
+
+def use_quick_tts(monkeypatch):
+    monkeypatch.setattr(elevenlabs_utils, "elevenlabs", QuickTTS())
+    monkeypatch.setattr(elevenlabs_utils, "phrase_cache", PhraseCache(1024 * 1024))
+
+
+def test_goodbye_plays_out_before_the_call_is_closed(monkeypatch):
+    use_quick_tts(monkeypatch)
+    monkeypatch.setattr(handlers, "HANGUP_GRACE", 0.1)
+
+    async def main():
+        twilio_ws = FakeTwilioSocket()
+        # Deepgram finishes its own audio before ElevenLabs has even started.
+        session = CallSession(twilio_ws, FakeAgentSocket([{"type": "AgentAudioDone"}]))
+        session.finish_call_sent = True
+        session.speak("Thanks for calling, goodbye.")
+        await asyncio.wait_for(handlers.sts_receiver(session), 10.0)
+        session.playout.close()
+        return twilio_ws
+
+    twilio_ws = asyncio.run(main())
+
+    media = [at for at, message in twilio_ws.sent if '"event":"media"' in message]
+    assert len(media) == SPEECH_FRAMES
+    assert twilio_ws.closed_at is not None
+    assert twilio_ws.closed_at >= media[-1] + 0.1
+
+
+def test_silence_watchdog_starts_when_playback_ends(monkeypatch):
+    use_quick_tts(monkeypatch)
+
+    async def main():
+        session = CallSession(FakeTwilioSocket(), FakeTwilioSocket())
+        session.speak("One moment while I check that for you.")
+        session.start_silence_timer()
+        await asyncio.sleep(2.0)
+        armed_while_speaking = session.silence_timer is not None
+        await asyncio.sleep(2.5)
+        armed_after = session.silence_timer is not None and session.silence_timer.active
+        session.cancel_timers()
+        session.playout.close()
+        return armed_while_speaking, armed_after
+
+    armed_while_speaking, armed_after = asyncio.run(main())
+
+    assert not armed_while_speaking
+    assert armed_after
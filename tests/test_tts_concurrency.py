@@ -0,0 +1,81 @@
+import asyncio
+import time
+
+import elevenlabs_utils
+import handlers
+from audio_queue import InboundAudioQueue
+from sessions import CallSession
+from tts_cache import PhraseCache
+
+from fakes import FakeTwilioSocket
+
+CALLS = 20
+SECONDS = 2.0
+
+
+class StampedQueue(InboundAudioQueue):
+    """Notes when each chunk reaches put_nowait()."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.stamps = []
+
+    def put_nowait(self, chunk):
+        self.stamps.append(time.monotonic())
+        super().put_nowait(chunk)
+
+
+class SlowTTS:
+    """Stands in for AsyncElevenLabs: 150 ms to the first chunk, then one every 20 ms."""
+
+    def __init__(self):
+        self.text_to_speech = self
+        self.active = 0
+        self.peak = 0
+
+    async def stream(self, **kwargs):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(0.15)
+            for _ in range(200):
+                yield b"\xff" * 1600
+                await asyncio.sleep(0.02)
+        finally:
+            self.active -= 1
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def test_inbound_audio_latency_stays_flat_while_all_calls_synthesize(monkeypatch):
+    tts = SlowTTS()
+    monkeypatch.setattr(elevenlabs_utils, "elevenlabs", tts)
+    monkeypatch.setattr(elevenlabs_utils, "phrase_cache", PhraseCache(1024 * 1024))
+
+    async def call(number):
+        twilio_ws = FakeTwilioSocket(frames=int(SECONDS / 0.02))
+        session = CallSession(twilio_ws, FakeTwilioSocket())
+        queue = StampedQueue(max_ms=SECONDS * 1000 + 1000)
+        session.speak(f"Thanks for calling, caller number {number}. Let me look up our prices for you.")
+        try:
+            await handlers.twilio_receiver(twilio_ws, queue, session)
+        finally:
+            session.cancel_speech()
+            session.playout.close()
+        latencies = [(queued - due) * 1000 for queued, due in zip(queue.stamps, twilio_ws.due)]
+        return latencies, len(twilio_ws.media_sent())
+
+    async def main():
+        return await asyncio.gather(*(call(number) for number in range(CALLS)))
+
+    results = asyncio.run(main())
+    latencies = [latency for call_latencies, _ in results for latency in call_latencies]
+
+    assert tts.peak >= CALLS, "every call should have been synthesizing at once"
+    assert all(sent > 0 for _, sent in results), "every call should have played TTS audio"
+    assert len(latencies) == CALLS * int(SECONDS / 0.02)
+    assert percentile(latencies, 0.99) < 20.0
+    assert max(latencies) < 50.0
@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+import webhooks
+from webhooks import WebhookDispatcher
+from loadtest.fakes import FakeWebhookServer
+
+
+@pytest.fixture
+def stub():
+    server = FakeWebhookServer()
+    server.start()
+    yield server
+    server.stop()
+
+
+def post_all(dispatcher, *posts):
+    """Run `dispatcher.post(*args)` for each of `posts` concurrently; return results or exceptions."""
+
+    async def main():
+        try:
+            return await asyncio.gather(*(dispatcher.post(*args) for args in posts), return_exceptions=True)
+        finally:
+            await dispatcher.aclose()
+
+    return asyncio.run(main())
+
+
+def test_retries_5xx_with_jitter_and_the_same_idempotency_key(stub, monkeypatch):
+    stub.statuses["place-order"] = [503, 502, 200]
+    backoffs = []
+
+    def uniform(low, high):
+        backoffs.append((low, high))
+        return 0.0
+
+    monkeypatch.setattr(webhooks.random, "uniform", uniform)
+    dispatcher = WebhookDispatcher(stub.url, retries=2, backoff=0.25)
+
+    [response] = post_all(dispatcher, ("place-order", {"id": 1}, {"Idempotency-Key": "key-1"}))
+
+    assert response.status_code == 200
+    assert [endpoint for endpoint, _, _ in stub.requests] == ["place-order"] * 3
+    assert {headers["Idempotency-Key"] for _, headers, _ in stub.requests} == {"key-1"}
+    # Full jitter over an exponentially growing window, once per retry.
+    assert backoffs == [(0, 0.25), (0, 0.5)]
+
+
+def test_gives_up_after_the_last_retry(stub, monkeypatch):
+    stub.statuses["place-order"] = [500]
+    monkeypatch.setattr(webhooks.random, "uniform", lambda low, high: 0.0)
+    dispatcher = WebhookDispatcher(stub.url, retries=2)
+
+    [response] = post_all(dispatcher, ("place-order", {"id": 1}))
+
+    assert response.status_code == 500
+    assert len(stub.requests) == 3
+
+
+def test_per_endpoint_timeout(stub, monkeypatch):
+    monkeypatch.setattr(webhooks, "WEBHOOK_TIMEOUTS", {"slow-endpoint": 0.2})
+    stub.delays["slow-endpoint"] = 1.0
+    stub.delays["patient-endpoint"] = 0.4
+    dispatcher = WebhookDispatcher(stub.url, retries=0)
+
+    started = time.monotonic()
+    slow, patient = post_all(dispatcher, ("slow-endpoint", {}), ("patient-endpoint", {}))
+    elapsed = time.monotonic() - started
+
+    assert isinstance(slow, httpx.TimeoutException)
+    # Endpoints without their own entry use the (much longer) default.
+    assert patient.status_code == 200
+    assert elapsed < 0.9
+
+
+def test_concurrency_is_capped(stub):
+    stub.delays["place-order"] = 0.2
+    dispatcher = WebhookDispatcher(stub.url, max_concurrency=3)
+
+    responses = post_all(dispatcher, *[("place-order", {"id": i}) for i in range(10)])
+
+    assert all(response.status_code == 200 for response in responses)
+    assert len(stub.requests) == 10
+    assert stub.peak == 3
@@ -0,0 +1,75 @@
+import re
+
+from config import TTS_SEGMENT_MIN_CHARS, TTS_SEGMENT_MAX_CHARS
+
+# A sentence ends at . ! ? (optionally followed by closing quotes/brackets)
+# when whitespace follows. Clause breaks are only used to cut long sentences.
+SENTENCE_END = re.compile(r"""(?<=[.!?…])(["'”’)\]]*)\s+""")
+CLAUSE_END = re.compile(r"""(?<=[,;:—–])\s+""")
+# Words whose trailing period does not end a sentence ("Main St. entrance").
+ABBREVIATIONS = {
+    "mr", "mrs", "ms", "dr", "st", "ave", "blvd", "rd", "ln", "ct", "apt", "ste",
+    "no", "vs", "e.g", "i.e",
+}
+# ...and those that end one when a capitalized word follows ("by 5 P.M. We").
+TERMINAL_ABBREVIATIONS = {"a.m", "p.m", "etc", "jr", "sr", "inc", "co"}
+
+
+def _sentences(text):
+    pieces = []
+    start = 0
+    for match in SENTENCE_END.finditer(text):
+        candidate = text[start:match.end(1)]
+        last_word = text[start:match.start()].rsplit(None, 1)[-1] if candidate.strip() else ""
+        last_word = last_word.rstrip(".").lower()
+        if last_word in ABBREVIATIONS:
+            continue
+        if last_word in TERMINAL_ABBREVIATIONS and not text[match.end():match.end() + 1].isupper():
+            continue
+        pieces.append(candidate)
+        start = match.end()
+    pieces.append(text[start:])
+    return [piece.strip() for piece in pieces if piece.strip()]
+
+
+def _split_long(sentence, max_chars):
+    """Cut an over-long sentence at clause breaks, then at word boundaries."""
+    if len(sentence) <= max_chars:
+        return [sentence]
+    parts = []
+    current = ""
+    for clause in CLAUSE_END.split(sentence):
+        words = clause.split(" ") if len(clause) > max_chars else [clause]
+        for word in words:
+            joiner = " " if current else ""
+            if current and len(current) + len(joiner) + len(word) > max_chars:
+                parts.append(current)
+                current = word
+            else:
+                current += joiner + word
+    if current:
+        parts.append(current)
+    return parts
+
+
+def split_for_tts(text, min_chars=TTS_SEGMENT_MIN_CHARS, max_chars=TTS_SEGMENT_MAX_CHARS):
+    """Split assistant text into sentence-sized segments for pipelined synthesis.
+
+    Segments shorter than `min_chars` are merged into the next one so a lone
+    "Great." does not cost its own request or sound clipped; sentences longer
+    than `max_chars` are cut at clause breaks.
+    """
+    segments = []
+    pending = ""
+    for sentence in _sentences(text.strip()):
+        for part in _split_long(sentence, max_chars):
+            pending = f"{pending} {part}" if pending else part
+            if len(pending) >= min_chars:
+                segments.append(pending)
+                pending = ""
+    if pending:
+        if segments and len(segments[-1]) + len(pending) < max_chars:
+            segments[-1] = f"{segments[-1]} {pending}"
+        else:
+            segments.append(pending)
+    return segments
@@ -0,0 +1,134 @@
+import asyncio
+import contextvars
+import logging
+import math
+
+from config import TIMER_WHEEL_TICK, TIMER_WHEEL_SLOTS
+
+log = logging.getLogger("timer_wheel")
+
+
+class TimerHandle:
+    """A scheduled callback on a TimerWheel; cancel() and reset() are O(1).
+
+    The callback runs in a copy of the context it was scheduled from, so it
+    logs under the call that armed it.
+    """
+
+    __slots__ = ("wheel", "callback", "args", "context", "bucket", "rounds")
+
+    def __init__(self, wheel, callback, args):
+        self.wheel = wheel
+        self.callback = callback
+        self.args = args
+        self.context = contextvars.copy_context()
+        self.bucket = None
+        self.rounds = 0
+
+    @property
+    def active(self):
+        return self.bucket is not None
+
+    def cancel(self):
+        if self.bucket is not None:
+            del self.bucket[self]
+            self.bucket = None
+            self.wheel.size -= 1
+
+    def reset(self, delay):
+        """Re-arm to fire `delay` seconds from now (whether pending or not)."""
+        self.cancel()
+        self.wheel._insert(self, delay)
+
+
+class TimerWheel:
+    """Process-wide hashed timer wheel for coarse per-call deadlines.
+
+    `slots` buckets of `tick` seconds each; a timer further out than one
+    revolution waits `rounds` extra passes in its bucket. Adding, cancelling
+    and resetting are dict operations, and the whole wheel costs one loop
+    callback per tick (none while it is empty) instead of a task and a heap
+    entry per timer. Deadlines are rounded up to the next tick.
+    """
+
+    def __init__(self, tick=TIMER_WHEEL_TICK, slots=TIMER_WHEEL_SLOTS):
+        self.tick = tick
+        self.buckets = [{} for _ in range(slots)]
+        self.position = 0
+        self.size = 0
+        self.loop = None
+        self.next_tick = None
+        self.handle = None
+        # Ticks run in a context of their own, not that of whichever call
+        # happened to start the wheel.
+        self.context = contextvars.Context()
+        self.tasks = set()
+
+    def call_later(self, delay, callback, *args):
+        """Run `callback(*args)` after `delay` seconds; a returned coroutine becomes a task."""
+        timer = TimerHandle(self, callback, args)
+        self._insert(timer, delay)
+        return timer
+
+    def _insert(self, timer, delay):
+        if self.handle is None:
+            self._start_ticking()
+        # Whole ticks after the next one (which runs the bucket at `position`).
+        ticks = max(0, math.ceil((self.loop.time() + delay - self.next_tick) / self.tick))
+        timer.rounds, offset = divmod(ticks, len(self.buckets))
+        bucket = self.buckets[(self.position + offset) % len(self.buckets)]
+        bucket[timer] = None
+        timer.bucket = bucket
+        self.size += 1
+
+    def _start_ticking(self):
+        self.loop = asyncio.get_running_loop()
+        self.next_tick = self.loop.time() + self.tick
+        self.handle = self.loop.call_at(self.next_tick, self._advance, context=self.context)
+
+    def _advance(self):
+        bucket = self.buckets[self.position]
+        self.position = (self.position + 1) % len(self.buckets)
+        self.next_tick += self.tick
+        due = []
+        for timer in bucket:
+            if timer.rounds:
+                timer.rounds -= 1
+            else:
+                due.append(timer)
+        for timer in due:
+            timer.cancel()
+        for timer in due:
+            self._fire(timer)
+
+        if self.size:
+            self.handle = self.loop.call_at(self.next_tick, self._advance, context=self.context)
+        else:
+            self.handle = None
+
+    def _fire(self, timer):
+        try:
+            result = timer.context.run(timer.callback, *timer.args)
+            if asyncio.iscoroutine(result):
+                task = self.loop.create_task(result, context=timer.context)
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+        except Exception:
+            log.exception("Timer callback %r failed", timer.callback)
+
+    def stop(self):
+        """Drop every pending timer and cancel the tasks fired timers started."""
+        if self.handle is not None:
+            self.handle.cancel()
+            self.handle = None
+        for task in self.tasks:
+            task.cancel()
+        self.tasks.clear()
+        for bucket in self.buckets:
+            for timer in bucket:
+                timer.bucket = None
+            bucket.clear()
+        self.size = 0
+
+
+TIMERS = TimerWheel()
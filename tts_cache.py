@@ -0,0 +1,119 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from collections import OrderedDict
+
+log = logging.getLogger("tts_cache")
+
+
+def normalize_text(text):
+    """Collapse whitespace so trivially different renderings share an entry."""
+    return " ".join(text.split())
+
+
+def cache_key(text, voice_id, voice_settings, model_id):
+    if hasattr(voice_settings, "model_dump"):
+        settings = voice_settings.model_dump()
+    elif hasattr(voice_settings, "dict"):
+        settings = voice_settings.dict()
+    else:
+        settings = voice_settings
+    material = json.dumps(
+        [normalize_text(text), voice_id, settings, model_id],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class PhraseCache:
+    """Byte-budget LRU of synthesized ulaw_8000 audio with an optional disk tier.
+
+    Disk reads and writes run in worker threads so file I/O never stalls the
+    event loop; writes happen in the background after put() returns.
+    """
+
+    def __init__(self, max_bytes, disk_dir=None):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.writes = set()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    async def get(self, key):
+        audio = self.entries.get(key)
+        if audio is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return audio
+
+        audio = await asyncio.to_thread(self._read_disk, key) if self.disk_dir else None
+        if audio is not None:
+            self.disk_hits += 1
+            self._insert(key, audio)
+            return audio
+
+        self.misses += 1
+        return None
+
+    def put(self, key, audio):
+        if not audio or len(audio) > self.max_bytes:
+            return
+        self._insert(key, audio)
+        if self.disk_dir:
+            write = asyncio.create_task(asyncio.to_thread(self._write_disk, key, audio))
+            self.writes.add(write)
+            write.add_done_callback(self.writes.discard)
+
+    def stats(self):
+        return {
+            "entries": len(self.entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _insert(self, key, audio):
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size -= len(old)
+        self.entries[key] = audio
+        self.size += len(audio)
+        while self.size > self.max_bytes and self.entries:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+            self.evictions += 1
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.ulaw")
+
+    def _read_disk(self, key):
+        try:
+            with open(self._disk_path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            log.warning("Failed to read %s: %s", key, e)
+            return None
+
+    def _write_disk(self, key, audio):
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, self._disk_path(key))
+        except Exception as e:
+            log.warning("Failed to write %s: %s", key, e)
@@ -0,0 +1,67 @@
+"""Fast encode/decode for the Twilio media-stream protocol.
+
+Outbound media messages are built from fixed string templates: everything after
+the streamSid (the "suffix") depends only on the audio frame, so it can be
+serialized once and the streamSid spliced in at send time. Base64 output never
+needs JSON escaping, which makes plain concatenation safe.
+
+Inbound media messages are by far the most frequent; `parse_media` pulls the
+track and payload straight out of the text and only falls back to json.loads
+for anything it does not recognise.
+"""
+import json
+from binascii import a2b_base64, b2a_base64
+
+MEDIA_PREFIX = '{"event":"media","streamSid":"'
+_PAYLOAD_HEAD = '","media":{"payload":"'
+_PAYLOAD_TAIL = '"}}'
+
+_EVENT_MEDIA = '"event":"media"'
+_TRACK_KEY = '"track":"'
+_PAYLOAD_KEY = '"payload":"'
+
+
+def media_suffix(frame):
+    """Serialize the part of a media message that follows the streamSid."""
+    return _PAYLOAD_HEAD + b2a_base64(frame, newline=False).decode("ascii") + _PAYLOAD_TAIL
+
+
+def media_message(stream_sid, suffix):
+    return MEDIA_PREFIX + (stream_sid or "") + suffix
+
+
+def clear_message(stream_sid):
+    return json.dumps({"event": "clear", "streamSid": stream_sid})
+
+
+def mark_message(stream_sid, name):
+    return json.dumps({"event": "mark", "streamSid": stream_sid, "mark": {"name": name}})
+
+
+def decode_payload(payload):
+    return a2b_base64(payload)
+
+
+def parse_media(message):
+    """Return (track, base64 payload) for a media message, else None.
+
+    None means "not a media message, or not in the compact form Twilio sends";
+    callers then parse the message with json.loads.
+    """
+    if not isinstance(message, str) or message.find(_EVENT_MEDIA, 0, 64) < 0:
+        return None
+    start = message.find(_TRACK_KEY)
+    if start < 0:
+        return None
+    start += len(_TRACK_KEY)
+    end = message.find('"', start)
+    track = message[start:end]
+
+    start = message.find(_PAYLOAD_KEY)
+    if start < 0:
+        return None
+    start += len(_PAYLOAD_KEY)
+    end = message.find('"', start)
+    if end < 0:
+        return None
+    return track, message[start:end]
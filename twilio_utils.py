@@ -1,36 +1,81 @@
+import logging
 import os
-import requests
+import httpx
 from datetime import datetime
 from zoneinfo import ZoneInfo
-from config import TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN
+from config import TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_API_URL, RECORDINGS_DIR
 
-def download_twilio_recording(recording_sid: str, file_format: str = "wav", dual_channel: bool = True) -> str:
+log = logging.getLogger("twilio_utils")
+
+TWILIO_API_BASE = f"{TWILIO_API_URL}/2010-04-01/Accounts/{TWILIO_ACCOUNT_SID}"
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+_client = None
+
+def twilio_client() -> httpx.AsyncClient:
+    """Shared keep-alive client for the Twilio REST API."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            auth=(TWILIO_ACCOUNT_SID or "", TWILIO_AUTH_TOKEN or ""),
+            timeout=httpx.Timeout(15.0, read=60.0),
+        )
+    return _client
+
+async def close_twilio_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+async def start_twilio_recording(call_sid: str, timeout: float = 10.0):
+    """Start recording `call_sid`; returns the Recording SID or None on failure."""
+    url = f"{TWILIO_API_BASE}/Calls/{call_sid}/Recordings.json"
+    response = await twilio_client().post(url, timeout=timeout)
+    if response.status_code in (200, 201):
+        return response.json().get("sid")
+    log.error("Starting recording failed: %s %s", response.status_code, response.text)
+    return None
+
+async def get_recording_status(recording_sid: str) -> str:
+    response = await twilio_client().get(f"{TWILIO_API_BASE}/Recordings/{recording_sid}.json")
+    if response.status_code == 404:
+        return "absent"
+    response.raise_for_status()
+    return response.json().get("status", "")
+
+async def download_twilio_recording(recording_sid: str, file_format: str = "wav", dual_channel: bool = True) -> str:
     if not TWILIO_ACCOUNT_SID or not TWILIO_AUTH_TOKEN:
         raise ValueError("Twilio credentials are missing.")
 
-    url = f"https://api.twilio.com/2010-04-01/Accounts/{TWILIO_ACCOUNT_SID}/Recordings/{recording_sid}.{file_format}"
+    url = f"{TWILIO_API_BASE}/Recordings/{recording_sid}.{file_format}"
     if dual_channel:
         url += "?RequestedChannels=2"
 
     pst_time = datetime.now(ZoneInfo("America/Los_Angeles"))
     file_name = pst_time.strftime("%m_%d_%H_%M")
-    folder_path = "recording/" + pst_time.strftime("%m_%d")
+    folder_path = os.path.join(RECORDINGS_DIR, pst_time.strftime("%m_%d"))
     os.makedirs(folder_path, exist_ok=True)
+    # The SID keeps recordings finished in the same minute from replacing each other.
+    filename = os.path.join(folder_path, f"{file_name}_{recording_sid}.{file_format}")
+    partial = f"{filename}.part"
 
-    response = requests.get(url, auth=(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN))
-    if response.status_code == 200:
-        filename = os.path.join(folder_path, f"{file_name}.{file_format}")
-        with open(filename, "wb") as f:
-            f.write(response.content)
-        print(f"Recording downloaded successfully: {filename}")
-        return filename
-    else:
-        raise Exception(f"Failed to download recording: {response.status_code} {response.text}")
+    # Stream to disk so memory stays bounded regardless of call length.
+    async with twilio_client().stream("GET", url) as response:
+        if response.status_code != 200:
+            await response.aread()
+            raise Exception(f"Failed to download recording: {response.status_code} {response.text}")
+        with open(partial, "wb") as f:
+            async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                f.write(chunk)
+    os.replace(partial, filename)
+    log.info("Recording downloaded: %s", filename)
+    return filename
 
-def delete_twilio_recording(recording_sid: str):
-    url = f"https://api.twilio.com/2010-04-01/Accounts/{TWILIO_ACCOUNT_SID}/Recordings/{recording_sid}.json"
-    response = requests.delete(url, auth=(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN))
+async def delete_twilio_recording(recording_sid: str):
+    url = f"{TWILIO_API_BASE}/Recordings/{recording_sid}.json"
+    response = await twilio_client().delete(url)
     if response.status_code == 204:
-        print(f"Recording {recording_sid} deleted successfully.")
+        log.info("Recording %s deleted", recording_sid)
     else:
-        print(f"Failed to delete recording {recording_sid}: {response.status_code} {response.text}")
+        log.error("Failed to delete recording %s: %s %s", recording_sid, response.status_code, response.text)
@@ -0,0 +1,123 @@
+import math
+
+import numpy as np
+
+from config import (
+    VAD_MARGIN_ON_DB,
+    VAD_MARGIN_OFF_DB,
+    VAD_MIN_DB,
+    VAD_MAX_ZCR,
+    VAD_START_FRAMES,
+    VAD_HANGOVER_FRAMES,
+)
+
+FRAME_SAMPLES = 160  # 20 ms at 8 kHz
+# Per-frame noise floor smoothing: toward quieter frames, toward louder ones
+# outside speech, and toward louder ones during a speech run.
+NOISE_FALL = 0.2
+NOISE_RISE = 0.02
+SPEECH_NOISE_RISE = 0.01
+
+
+def _ulaw_table():
+    """G.711 mu-law byte -> linear sample, scaled to [-1, 1]."""
+    codes = ~np.arange(256, dtype=np.uint8)
+    sign = codes & 0x80
+    exponent = (codes >> 4) & 0x07
+    mantissa = codes & 0x0F
+    magnitude = ((mantissa.astype(np.int32) << 3) + 0x84) << exponent
+    linear = np.where(sign, 0x84 - magnitude, magnitude - 0x84)
+    return (linear / 32768.0).astype(np.float32)
+
+
+ULAW_TO_FLOAT = _ulaw_table()
+
+
+def frame_features(audio):
+    """Per-20 ms-frame energy (dBFS) and zero-crossing rate lists of mu-law `audio`.
+
+    The sign of a mu-law sample is bit 7 of its code, so zero crossings are
+    counted on the raw bytes. A trailing partial frame is ignored.
+    """
+    frames = len(audio) // FRAME_SAMPLES
+    codes = np.frombuffer(audio, dtype=np.uint8, count=frames * FRAME_SAMPLES)
+    if frames == 1:
+        # Twilio's usual 20 ms frame: scalar results skip most array overhead.
+        samples = ULAW_TO_FLOAT[codes]
+        energy = float(np.dot(samples, samples)) / FRAME_SAMPLES
+        crossings = np.count_nonzero((codes[1:] ^ codes[:-1]) & 0x80)
+        return [10.0 * math.log10(energy + 1e-10)], [crossings / (FRAME_SAMPLES - 1)]
+    codes = codes.reshape(frames, FRAME_SAMPLES)
+    samples = ULAW_TO_FLOAT[codes]
+    energy = np.einsum("ij,ij->i", samples, samples) / FRAME_SAMPLES
+    energy_db = 10.0 * np.log10(energy + 1e-10)
+    crossings = np.count_nonzero((codes[:, 1:] ^ codes[:, :-1]) & 0x80, axis=1)
+    return energy_db.tolist(), (crossings / (FRAME_SAMPLES - 1)).tolist()
+
+
+class VoiceActivityDetector:
+    """Energy / zero-crossing VAD with an adaptive noise floor and hysteresis.
+
+    A frame is speech when it is `margin_on` dB above the tracked noise floor
+    (`margin_off` once speech has started, so a talker's quieter syllables do
+    not end the run), above `min_db`, and not hiss-like (ZCR below `max_zcr`).
+    Speech starts after `start_frames` consecutive speech frames and ends after
+    `hangover_frames` non-speech ones. The floor keeps creeping up during speech,
+    so a steady sound (a fan, road rumble) ends its run after a few seconds
+    instead of counting as speech forever.
+    """
+
+    def __init__(self, margin_on=VAD_MARGIN_ON_DB, margin_off=VAD_MARGIN_OFF_DB, min_db=VAD_MIN_DB,
+                 max_zcr=VAD_MAX_ZCR, start_frames=VAD_START_FRAMES, hangover_frames=VAD_HANGOVER_FRAMES):
+        self.margin_on = margin_on
+        self.margin_off = margin_off
+        self.min_db = min_db
+        self.max_zcr = max_zcr
+        self.start_frames = start_frames
+        self.hangover_frames = hangover_frames
+        self.noise_floor = -60.0
+        self.speaking = False
+        self.run = 0        # consecutive speech frames (before start) / non-speech (during)
+        self.speech_frames = 0
+        self.speech_runs = 0
+
+    @property
+    def speech_ms(self):
+        """Length of the current speech run, 0 when not speaking."""
+        return self.speech_frames * 20 if self.speaking else 0
+
+    def process(self, audio):
+        """Feed mu-law audio; return "start", "end" or None for this chunk."""
+        return self.update(*frame_features(audio))
+
+    def update(self, energy_db, zcr):
+        """Like process(), for features already computed by frame_features()."""
+        event = None
+        for level, crossings in zip(energy_db, zcr):
+            margin = self.margin_off if self.speaking else self.margin_on
+            is_speech = (level > self.noise_floor + margin and level > self.min_db
+                         and crossings < self.max_zcr)
+            if self.speaking:
+                self._track_noise(level, SPEECH_NOISE_RISE)
+                self.speech_frames += 1
+                self.run = 0 if is_speech else self.run + 1
+                if self.run >= self.hangover_frames:
+                    self.speaking = False
+                    self.run = 0
+                    event = "end"
+            else:
+                self._track_noise(level)
+                self.run = self.run + 1 if is_speech else 0
+                if self.run >= self.start_frames:
+                    self.speaking = True
+                    self.speech_frames = self.run
+                    self.speech_runs += 1
+                    self.run = 0
+                    event = "start"
+        return event
+
+    def _track_noise(self, level, rise=NOISE_RISE):
+        # Fall quickly to a quieter line, rise slowly so speech onsets do not
+        # drag the floor up with them.
+        rate = NOISE_FALL if level < self.noise_floor else rise
+        self.noise_floor += rate * (level - self.noise_floor)
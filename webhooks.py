@@ -0,0 +1,84 @@
+import asyncio
+import logging
+import random
+import httpx
+from config import (
+    N8N_WEBHOOK_BASE,
+    WEBHOOK_MAX_CONNECTIONS,
+    WEBHOOK_MAX_CONCURRENCY,
+    WEBHOOK_RETRIES,
+    WEBHOOK_DEFAULT_TIMEOUT,
+    WEBHOOK_TIMEOUTS,
+)
+
+log = logging.getLogger("webhooks")
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class WebhookDispatcher:
+    """Shared keep-alive client for the n8n webhooks.
+
+    Requests run on the event loop (never blocking other calls' audio), are
+    bounded by a per-endpoint timeout and a global concurrency limit, and are
+    retried with exponential backoff and full jitter on transport errors and
+    retryable status codes.
+    """
+
+    def __init__(
+        self,
+        base_url=N8N_WEBHOOK_BASE,
+        max_connections=WEBHOOK_MAX_CONNECTIONS,
+        max_concurrency=WEBHOOK_MAX_CONCURRENCY,
+        retries=WEBHOOK_RETRIES,
+        backoff=0.25,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.client = None
+        self.semaphore = None
+
+    def _ensure_client(self):
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+            self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self.client
+
+    def url(self, endpoint):
+        return f"{self.base_url}/{endpoint}"
+
+    async def post(self, endpoint, payload, headers=None):
+        """POST `payload` as JSON to an n8n endpoint; raises after the last retry."""
+        client = self._ensure_client()
+        timeout = WEBHOOK_TIMEOUTS.get(endpoint, WEBHOOK_DEFAULT_TIMEOUT)
+
+        for attempt in range(self.retries + 1):
+            try:
+                async with self.semaphore:
+                    response = await client.post(
+                        self.url(endpoint), json=payload, headers=headers, timeout=timeout
+                    )
+                if response.status_code not in RETRY_STATUS or attempt == self.retries:
+                    return response
+                log.warning("%s returned %s, retrying", endpoint, response.status_code)
+            except httpx.TransportError as e:
+                if attempt == self.retries:
+                    raise
+                log.warning("%s failed (%r), retrying", endpoint, e)
+            await asyncio.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+
+    async def aclose(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+
+WEBHOOKS = WebhookDispatcher()